@@ -1,11 +1,23 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import streamlit as st
 from pypfopt import risk_models, expected_returns, plotting, objective_functions
-from pypfopt import BlackLittermanModel, EfficientFrontier, HRPOpt
+from pypfopt import BlackLittermanModel, EfficientFrontier
 from pypfopt import black_litterman
 from sklearn.preprocessing import MinMaxScaler
+from sketches import QuantileSketch
+from fundamentals import market_cap_provider
+from risk_cache import risk_cache
+from frontier import efficient_frontier
+from hrp import hrp_engine
+from model_registry import model_registry, model_key
+from sentiment import sentiment_service
+from rate_limiter import rate_limiter
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -21,25 +33,27 @@ except ImportError:
 # Data Utilities
 # ==========================================
 
-@st.cache_data
+@st.cache_data(ttl=3600)
 def load_market_caps(tickers):
-    mcaps = {}
-    for t in tickers:
-        try:
-            stock = yf.Ticker(t)
-            mcaps[t] = stock.info.get('marketCap', 0)
-        except:
-            mcaps[t] = 0
-    return mcaps
+    # Rate-limited, concurrent and cached on disk for a day (see fundamentals.py)
+    return market_cap_provider.get_many(list(tickers))
 
 # ==========================================
 # Phase 1: Advanced Algorithms
 # ==========================================
 
-def run_black_litterman(prices, market_prices, view_dict=None):
+def run_black_litterman(prices, market_prices, view_dict=None, cov_window=None, cov_halflife=None,
+                        cov_matrix=None, market_caps=None):
     # 1. Calculate Covariance Matrix & Delta
+    # (rolling/EWMA covariance is updated incrementally as bars arrive; annualized like Ledoit-Wolf)
+    # cov_matrix/market_caps let callers such as the backtester supply precomputed inputs
     try:
-        S = risk_models.CovarianceShrinkage(prices).ledoit_wolf()
+        if cov_matrix is not None:
+            S = cov_matrix
+        elif cov_window or cov_halflife:
+            S = risk_cache.streaming_cov(prices, window=cov_window, halflife=cov_halflife) * 252
+        else:
+            S = risk_cache.shrunk_cov(prices)
         delta = black_litterman.market_implied_risk_aversion(market_prices)
     except Exception as e:
         print(f"Error calculating covariance or delta: {e}")
@@ -47,7 +61,7 @@ def run_black_litterman(prices, market_prices, view_dict=None):
     
     # 2. Market Cap for Market Prior
     tickers = prices.columns.tolist()
-    mcaps = load_market_caps(tickers)
+    mcaps = market_caps if market_caps is not None else load_market_caps(tickers)
     
     # 3. BL Model
     # Default view if none provided
@@ -66,73 +80,243 @@ def run_black_litterman(prices, market_prices, view_dict=None):
     weights = ef.max_sharpe()
     return weights
 
-def run_hrp(prices):
-    returns = prices.pct_change().dropna()
-    hrp = HRPOpt(returns)
-    weights = hrp.optimize()
-    return weights
+def run_efficient_frontier(prices, n_points=50, sweep="return", n_workers=1):
+    """Frontier points and weights on the same inputs pypfopt's max_sharpe would use"""
+    mu = expected_returns.mean_historical_return(prices)
+    S = risk_cache.shrunk_cov(prices)
+    return efficient_frontier(mu, S, n_points=n_points, sweep=sweep, n_workers=n_workers)
 
-def run_monte_carlo(prices, simulations=10000, time_horizon=252):
-    returns = prices.pct_change().dropna()
-    mean_returns = returns.mean()
-    cov_matrix = returns.cov()
-    
-    sim_results = np.zeros((simulations, time_horizon))
-    last_price = 100 
-    
-    for i in range(simulations):
-        daily_returns = np.random.multivariate_normal(mean_returns, cov_matrix, time_horizon)
-        portfolio_daily_returns = daily_returns.mean(axis=1)
-        cumulative_returns = np.cumprod(1 + portfolio_daily_returns)
-        sim_results[i, :] = last_price * cumulative_returns
-        
-    return sim_results
+def run_hrp(prices, cov_window=None, cov_halflife=None, cov_matrix=None, linkage_method="single"):
+    """HRP weights via the cached hrp_engine (same allocation as HRPOpt, scales to large universes)"""
+    if cov_matrix is None:
+        if cov_window or cov_halflife:
+            cov_matrix = risk_cache.streaming_cov(prices, window=cov_window, halflife=cov_halflife)
+        else:
+            cov_matrix = risk_cache.sample_cov(prices)
+    weights = hrp_engine.weights(cov_matrix, linkage_method)
+    return OrderedDict(weights.items())
+
+# Upper bound on the size of one chunk of random shocks (paths x days x assets)
+MC_CHUNK_BYTES = 64 * 1024 ** 2
+# Default paths per chunk: small enough to keep a process pool balanced
+MC_CHUNK_PATHS = 1000
+
+def _cholesky_factor(cov_matrix):
+    """Cholesky factor of the covariance, nudging the diagonal if it is not positive definite"""
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+    jitter = 0.0
+    scale = max(float(np.mean(np.diag(cov))), 1e-12)
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 100
+    # Last resort: symmetric square root with negative eigenvalues clipped
+    vals, vecs = np.linalg.eigh(cov)
+    return vecs * np.sqrt(np.clip(vals, 0, None))
+
+def _chunk_sizes(simulations, time_horizon, n_assets, dtype, chunk_size=None):
+    # Never depends on n_workers: the chunking fixes the seed streams, hence the paths
+    if chunk_size is None:
+        per_path = time_horizon * n_assets * np.dtype(dtype).itemsize
+        chunk_size = max(1, min(MC_CHUNK_PATHS, MC_CHUNK_BYTES // max(per_path, 1)))
+    chunk_size = int(min(chunk_size, simulations))
+    sizes = [chunk_size] * (simulations // chunk_size)
+    if simulations % chunk_size:
+        sizes.append(simulations % chunk_size)
+    return sizes
+
+def _simulate_chunk(rng, drift, loading, n_paths, time_horizon, last_price, dtype):
+    """Portfolio value paths for one chunk: r_p = w.mu + (L^T w).z with z ~ N(0, I)"""
+    shocks = rng.standard_normal((n_paths, time_horizon, len(loading)), dtype=dtype)
+    portfolio_daily_returns = shocks @ loading
+    portfolio_daily_returns += drift
+    return last_price * np.cumprod(1 + portfolio_daily_returns, axis=1)
+
+def _risk_sketches(last_price):
+    """Empty sketches for final portfolio value and per-path maximum drawdown"""
+    return (QuantileSketch(last_price * 1e-3, last_price * 1e3, bins=4096, log=True),
+            QuantileSketch(0.0, 1.0, bins=2000))
+
+def _max_drawdown(paths, last_price):
+    peaks = np.maximum(np.maximum.accumulate(paths, axis=1), last_price)
+    return (1 - paths / peaks).max(axis=1)
+
+def _run_chunk(params, n_paths, seed_seq):
+    drift, loading, time_horizon, last_price, dtype, keep_paths = params
+    rng = np.random.default_rng(seed_seq)
+    paths = _simulate_chunk(rng, drift, loading, n_paths, time_horizon, last_price, dtype)
+    if keep_paths:
+        return paths
+    final_sketch, drawdown_sketch = _risk_sketches(last_price)
+    final_sketch.update(paths[:, -1])
+    drawdown_sketch.update(_max_drawdown(paths, last_price))
+    return final_sketch, drawdown_sketch
+
+# Per-process simulation inputs, set once by the pool initializer so the
+# covariance loading is shipped to each worker once instead of with every task
+_MC_WORKER_PARAMS = None
+
+def _mc_worker_init(params):
+    global _MC_WORKER_PARAMS
+    _MC_WORKER_PARAMS = params
+
+def _mc_worker_chunk(n_paths, seed_seq):
+    return _run_chunk(_MC_WORKER_PARAMS, n_paths, seed_seq)
+
+def _portfolio_weights(weights, columns):
+    """Align a weight dict/Series/array with the price columns and normalize to sum to 1"""
+    if weights is None:
+        return np.full(len(columns), 1.0 / len(columns))
+    if isinstance(weights, (dict, pd.Series)):
+        w = pd.Series(weights, dtype=float).reindex(columns).fillna(0.0).values
+    else:
+        w = np.asarray(weights, dtype=float)
+        if w.shape != (len(columns),):
+            raise ValueError(f"Expected {len(columns)} weights, got shape {w.shape}")
+    total = w.sum()
+    if np.isclose(total, 0.0):
+        raise ValueError("Portfolio weights sum to zero")
+    return w / total
+
+def run_monte_carlo(prices, simulations=10000, time_horizon=252, seed=None, dtype=np.float64,
+                    chunk_size=None, return_paths=True, n_workers=1, bins=50, weights=None):
+    """
+    Simulate portfolio paths from one Cholesky factorization of the covariance.
+    `weights` (dict/Series keyed by ticker, or an array) defaults to equal weight; output from
+    run_hrp or run_black_litterman can be passed straight in.
+    Paths are drawn in chunks of `chunk_size` (default MC_CHUNK_PATHS, capped by MC_CHUNK_BYTES), each with
+    its own child of SeedSequence(seed), so a given seed gives the same paths for any n_workers.
+    n_workers > 1 (or None for all cores) spreads the chunks over a process pool.
+    With return_paths=False no path is kept: each chunk feeds fixed-size quantile sketches and
+    only VaR/CVaR (95%), drawdown quantiles and a histogram are returned, in constant memory.
+    """
+    if simulations < 1:
+        raise ValueError(f"simulations must be at least 1, got {simulations}")
+    returns = risk_cache.clean_returns(prices)
+    mean_returns = risk_cache.mean_returns(prices).values
+    cov_matrix = risk_cache.sample_cov(prices).values
+    dtype = np.dtype(dtype)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    n_assets = len(mean_returns)
+    w = _portfolio_weights(weights, returns.columns)
+    chol = _cholesky_factor(cov_matrix)
+    loading = (chol.T @ w).astype(dtype)
+    drift = dtype.type(mean_returns @ w)
+    last_price = 100
+    params = (drift, loading, time_horizon, last_price, dtype, return_paths)
+
+    sizes = _chunk_sizes(simulations, time_horizon, n_assets, dtype, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if n_workers > 1 and len(sizes) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(n_workers, len(sizes)),
+                                   initializer=_mc_worker_init, initargs=(params,))
+        with pool:
+            chunks = pool.map(_mc_worker_chunk, sizes, seeds)
+            results = _collect_chunks(chunks, sizes, simulations, time_horizon, dtype,
+                                      return_paths, last_price)
+    else:
+        chunks = (_run_chunk(params, n, s) for n, s in zip(sizes, seeds))
+        results = _collect_chunks(chunks, sizes, simulations, time_horizon, dtype,
+                                  return_paths, last_price)
+
+    if return_paths:
+        return results
+
+    final_sketch, drawdown_sketch = results
+    return {
+        "var_95": final_sketch.quantile(0.05),
+        "cvar_95": final_sketch.tail_mean(0.05),
+        "median_final": final_sketch.quantile(0.5),
+        "median_drawdown": drawdown_sketch.quantile(0.5),
+        "drawdown_95": drawdown_sketch.quantile(0.95),
+        "histogram": final_sketch.histogram(bins),
+        "sketches": {"final_value": final_sketch, "max_drawdown": drawdown_sketch},
+    }
+
+def _collect_chunks(chunks, sizes, simulations, time_horizon, dtype, return_paths, last_price):
+    """Write chunk paths into one preallocated array, or merge chunk sketches, as they arrive"""
+    if not return_paths:
+        final_sketch, drawdown_sketch = _risk_sketches(last_price)
+        for chunk_final, chunk_drawdown in chunks:
+            final_sketch.merge(chunk_final)
+            drawdown_sketch.merge(chunk_drawdown)
+        return final_sketch, drawdown_sketch
+
+    out = np.empty((simulations, time_horizon), dtype=dtype)
+    start = 0
+    for n_paths, chunk in zip(sizes, chunks):
+        out[start:start + n_paths] = chunk
+        start += n_paths
+    return out
 
 # ==========================================
 # Phase 2: ML & Deep Learning
 # ==========================================
 
-def run_lstm_prediction(stock_data):
+def make_windows(values, window):
+    """(X, y) training pairs: every run of `window` values and the value right after it"""
+    values = np.asarray(values, dtype=np.float32)
+    # Strided view over the series, no per-window copies
+    x = np.lib.stride_tricks.sliding_window_view(values[:-1], window)
+    return x[..., np.newaxis], values[window:]
+
+def _build_lstm(window, units):
+    model = Sequential()
+    model.add(LSTM(units=units, return_sequences=True, input_shape=(window, 1)))
+    model.add(LSTM(units=units))
+    model.add(Dense(units=1))
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+def run_lstm_prediction(stock_data, ticker=None, window=60, units=50, epochs=20, finetune_epochs=3,
+                        registry=model_registry):
+    """
+    Next-day price and log return from an LSTM over `window` days of log returns.
+    With a registry the trained model is kept per (ticker, hyperparameters) and later calls
+    only fine-tune on bars added since the last fit; registry=None always trains from scratch.
+    """
     if not HAS_TF:
         return 0.0, 0.0
         
     # Use Log Returns for stationarity
     log_returns = np.log(stock_data / stock_data.shift(1)).dropna()
-    
-    # Data Prep
-    data = log_returns.values.reshape(-1, 1)
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(data)
-    
-    # Create Sequences
-    prediction_days = 60
-    if len(scaled_data) < prediction_days + 10:
+    if len(log_returns) < window + 10:
         return 0.0, 0.0 # Not enough data
-        
-    x_train, y_train = [], []
-    
-    for x in range(prediction_days, len(scaled_data)):
-        x_train.append(scaled_data[x-prediction_days:x, 0])
-        y_train.append(scaled_data[x, 0])
-        
-    x_train, y_train = np.array(x_train), np.array(y_train)
-    x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], 1))
-    
-    # Build Model
-    model = Sequential()
-    model.add(LSTM(units=50, return_sequences=True, input_shape=(x_train.shape[1], 1)))
-    model.add(LSTM(units=50))
-    model.add(Dense(units=1))
-    
-    model.compile(optimizer='adam', loss='mean_squared_error')
-    model.fit(x_train, y_train, epochs=20, batch_size=32, verbose=0)
-    
-    # Predict Next Day Return
-    real_data = [scaled_data[len(scaled_data) + 1 - prediction_days : len(scaled_data+1), 0]]
-    real_data = np.array(real_data)
-    real_data = np.reshape(real_data, (real_data.shape[0], real_data.shape[1], 1))
+    data = log_returns.values.reshape(-1, 1)
+
+    key = model_key(str(ticker or stock_data.name), window=window, units=units, epochs=epochs)
+    entry = registry.load(key) if registry is not None else None
+    if entry is None:
+        scaler = MinMaxScaler(feature_range=(0, 1)).fit(data)
+        scaled_data = scaler.transform(data)[:, 0]
+        x_train, y_train = make_windows(scaled_data, window)
+        model = _build_lstm(window, units)
+        model.fit(x_train, y_train, epochs=epochs, batch_size=32, verbose=0)
+        meta = {"data_min": float(scaler.data_min_[0]), "data_max": float(scaler.data_max_[0]),
+                "last_date": str(log_returns.index[-1]), "bars": len(log_returns)}
+        if registry is not None:
+            registry.save(key, model, meta)
+    else:
+        model, meta = entry
+        # Keep the original scaling so the learned weights still apply
+        scaler = MinMaxScaler(feature_range=(0, 1)).fit([[meta["data_min"]], [meta["data_max"]]])
+        scaled_data = scaler.transform(data)[:, 0]
+        new_bars = int((log_returns.index > pd.Timestamp(meta["last_date"])).sum())
+        new_bars = min(new_bars, len(scaled_data) - window)
+        if new_bars > 0:
+            # Warm start: fine-tune only on windows whose target arrived since the last fit
+            x_new, y_new = make_windows(scaled_data[-(window + new_bars):], window)
+            model.fit(x_new, y_new, epochs=finetune_epochs, batch_size=32, verbose=0)
+            meta = {**meta, "last_date": str(log_returns.index[-1]), "bars": meta["bars"] + new_bars}
+            registry.save(key, model, meta)
     
-    prediction_scaled = model.predict(real_data)
+    # Predict Next Day Return from the latest full window
+    real_data = scaled_data[-window:].reshape(1, window, 1)
+    prediction_scaled = model.predict(real_data, verbose=0)
     prediction_log_return = scaler.inverse_transform(prediction_scaled)[0][0]
     
     # Convert Log Return back to Price: P_next = P_current * e^r
@@ -141,27 +325,126 @@ def run_lstm_prediction(stock_data):
     
     return predicted_price, prediction_log_return
 
+def run_batch_lstm_forecast(prices, window=60, units=50, epochs=10, finetune_epochs=3,
+                            registry=model_registry):
+    """
+    Next-day forecasts for every column of `prices` from ONE LSTM trained on the windows of
+    all tickers together (each ticker min-max scaled on its own). The pooled model is kept in
+    the registry; later runs fine-tune only on new bars and on tickers it has not seen yet.
+    Returns a DataFrame indexed by ticker.
+    """
+    if not HAS_TF:
+        return pd.DataFrame()
+
+    key = model_key("__pooled__", window=window, units=units, epochs=epochs)
+    entry = registry.load(key) if registry is not None else None
+    model, meta = entry if entry is not None else (None, {"scalers": {}, "last_date": {}})
+    scalers, last_dates = dict(meta["scalers"]), dict(meta["last_date"])
+
+    x_parts, y_parts, latest = [], [], {}
+    for ticker in prices.columns:
+        log_returns = np.log(prices[ticker] / prices[ticker].shift(1)).dropna()
+        if len(log_returns) < window + 10:
+            continue
+        values = log_returns.values
+        lo, hi = scalers.get(ticker, (float(values.min()), float(values.max())))
+        scalers[ticker] = (lo, hi)
+        scaled = (values - lo) / ((hi - lo) or 1.0)
+
+        # Train on every window for unseen tickers, only the new bars' windows otherwise
+        new_bars = len(values) - window
+        if model is not None and ticker in last_dates:
+            new_bars = min(new_bars, int((log_returns.index > pd.Timestamp(last_dates[ticker])).sum()))
+        if new_bars > 0:
+            x, y = make_windows(scaled[-(window + new_bars):], window)
+            x_parts.append(x)
+            y_parts.append(y)
+        last_dates[ticker] = str(log_returns.index[-1])
+        latest[ticker] = scaled[-window:]
+
+    if not latest:
+        return pd.DataFrame()
+    if x_parts:
+        fresh = model is None
+        model = model or _build_lstm(window, units)
+        model.fit(np.concatenate(x_parts), np.concatenate(y_parts),
+                  epochs=epochs if fresh else finetune_epochs, batch_size=256, verbose=0)
+        if registry is not None:
+            registry.save(key, model, {"scalers": scalers, "last_date": last_dates})
+
+    # One forward pass for the whole universe
+    tickers = list(latest)
+    predicted = model.predict(np.stack([latest[t] for t in tickers])[..., np.newaxis], verbose=0)[:, 0]
+    lo, hi = np.array([scalers[t] for t in tickers]).T
+    log_return = predicted * np.where(hi > lo, hi - lo, 1.0) + lo
+    current = np.array([prices[t].dropna().iloc[-1] for t in tickers])
+    forecast = current * np.exp(log_return)
+    return pd.DataFrame({"Current Price": current, "Forecast": forecast, "Log Return": log_return,
+                         "Change %": (forecast / current - 1) * 100}, index=pd.Index(tickers, name="Ticker"))
+
+def _template_news(ticker):
+    return [
+        f"{ticker} reports strong earnings growth and positive outlook.",
+        f"{ticker} faces regulatory scrutiny and potential fines.",
+        f"{ticker} announces new product launch and expansion plans."
+    ]
+
 def get_finbert_sentiment(ticker):
     try:
-        import os
-        os.environ["TF_USE_LEGACY_KERAS"] = "1"
-        from transformers import pipeline
-        # Cache the pipeline to avoid reloading
-        @st.cache_resource
-        def load_sentiment_pipeline():
-            return pipeline("sentiment-analysis", model="yiyanghkust/finbert-tone")
-            
-        nlp = load_sentiment_pipeline()
-        
-        dummy_news = [
-            f"{ticker} reports strong earnings growth and positive outlook.",
-            f"{ticker} faces regulatory scrutiny and potential fines.",
-            f"{ticker} announces new product launch and expansion plans."
-        ]
         import random
-        text = random.choice(dummy_news)
-        
-        result = nlp(text)[0]
+        text = random.choice(_template_news(ticker))
+        # Loaded once per process and cached by (ticker, text), see sentiment.py
+        result = sentiment_service.score([(ticker, text)])[0]
         return f"{result['label']} (Conf: {result['score']:.2f}) based on: '{text}'"
     except Exception as e:
         return f"Error: {str(e)}"
+
+class HeadlineCache:
+    """Recent news titles per ticker, fetched a few at a time through the limiter and kept for `ttl` seconds"""
+    def __init__(self, limiter, ttl=1800, max_workers=4):
+        self.limiter = limiter
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.titles = {}  # ticker -> (fetched_at, [title, ...]); an empty list when Yahoo had none
+        self.lock = threading.Lock()
+
+    def _fetch(self, ticker):
+        news = self.limiter.ticker_attribute(ticker, "news") or []
+        # Newer yfinance nests the title under "content"
+        return [t for t in ((item.get("content") or item).get("title") for item in news) if t]
+
+    def get(self, tickers, per_ticker=10):
+        """{ticker: titles}; only tickers not fetched within the TTL hit the network, concurrently"""
+        tickers = list(dict.fromkeys(tickers))
+        now = time.monotonic()
+        with self.lock:
+            stale = [t for t in tickers if t not in self.titles or now - self.titles[t][0] >= self.ttl]
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                fetched = list(pool.map(self._fetch, stale))
+            with self.lock:
+                for ticker, titles in zip(stale, fetched):
+                    self.titles[ticker] = (time.monotonic(), titles)
+        with self.lock:
+            return {t: self.titles[t][1][:per_ticker] for t in tickers}
+
+
+headline_cache = HeadlineCache(rate_limiter)
+
+def load_headlines(tickers, per_ticker=10):
+    """{ticker: recent news titles} through the rate limiter; template headlines where Yahoo has none"""
+    return {ticker: titles or _template_news(ticker)
+            for ticker, titles in headline_cache.get(tickers, per_ticker).items()}
+
+def score_headlines(headlines):
+    """Per-ticker FinBERT summary of {ticker: [headline, ...]}, scored in one batched pass"""
+    items = [(ticker, text) for ticker, texts in headlines.items() for text in texts]
+    scores = sentiment_service.score(items)
+    frame = pd.DataFrame({"Ticker": [t for t, _ in items],
+                          "Label": [s["label"].capitalize() for s in scores],
+                          "Score": [s["score"] for s in scores]})
+    signed = frame["Score"] * frame["Label"].map({"Positive": 1, "Negative": -1}).fillna(0)
+    summary = frame.groupby("Ticker")["Label"].value_counts().unstack(fill_value=0)
+    summary["Headlines"] = frame.groupby("Ticker").size()
+    summary["Net Sentiment"] = signed.groupby(frame["Ticker"]).mean()
+    return summary.sort_values("Net Sentiment", ascending=False)
@@ -1,21 +1,27 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import ta
-from ta.volatility import BollingerBands
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
 from datetime import datetime, timedelta
 
 from algorithms import * # Load Analysis Logic
 from rate_limiter import rate_limiter  # Import rate limiter
+from background_loader import BackgroundLoader
+from risk_cache import risk_cache, panel_fingerprint
+from indicators import indicator_cache
+from decimate import decimate_series, decimate_frame, resample_ohlc, fan_bands
+from sentiment import sentiment_service
+from backtest import walk_forward, STRATEGIES
+from quotes import quote_service
+from regional import regional_panels, REGION_TICKERS
+from fundamentals import fundamentals_store
 
 # ==========================================
 # ⚙️ CONFIGURATION & DATA ENGINE
 # ==========================================
 st.set_page_config(page_title="In-House Bloomberg Terminal", layout="wide")
+# Start loading FinBERT in the background (once per process) so sentiment clicks don't wait
+sentiment_service.warm_up()
 
 # Sidebar for Ticker Input
 st.sidebar.header("🕹️ Command Center")
@@ -91,87 +97,70 @@ benchmark_ticker = "^NSEI"  # Use NIFTY as default benchmark
 
 start_date = st.sidebar.date_input("Start Date", datetime(2023, 1, 1))
 end_date = st.sidebar.date_input("End Date", datetime.now())
+# Points per chart trace; long histories are down-sampled to this on the server
+chart_points = st.sidebar.select_slider("Chart Detail (points per line)", [500, 1000, 2000, 4000], value=2000)
 
 # ==========================================
 # 🔄 INCREMENTAL DATA ENGINE (Streaming Load)
 # ==========================================
 
 # Initialize Session State
-if 'prices' not in st.session_state:
-    st.session_state.prices = pd.DataFrame()
-if 'market_prices' not in st.session_state:
-    st.session_state.market_prices = pd.Series(dtype=float)
 if 'last_config' not in st.session_state:
     st.session_state.last_config = ""
-if 'failed_tickers' not in st.session_state:
-    st.session_state.failed_tickers = set()
-
-# Detect Config Changes (tickers, dates) and reset if needed
-current_config = f"{','.join(tickers)}_{start_date}_{end_date}_{benchmark_ticker}"
-if st.session_state.last_config != current_config:
-    st.session_state.prices = pd.DataFrame()
-    st.session_state.market_prices = pd.Series(dtype=float)
-    st.session_state.failed_tickers = set()
-    st.session_state.last_config = current_config
-
-# Helper to load data in a traditional way (for Global Markets)
-@st.cache_data(ttl=3600)
-def load_data(tickers_list, start, end):
-    return rate_limiter.download_in_batches(tickers_list, start, end)
-
-# Helper to load data one-by-one (Incremental Loader)
-def fetch_next_missing():
-    # Only background load if not paused
+if 'seen_version' not in st.session_state:
+    st.session_state.seen_version = -1
+
+# Detect Config Changes (tickers) and start a fresh background loader if needed
+current_config = f"{','.join(tickers)}_{benchmark_ticker}"
+loader = st.session_state.get('loader')
+if loader is None or st.session_state.last_config != current_config:
+    if loader is not None:
+        loader.stop()  # Its thread exits instead of lingering for the rest of the session
+    loader = BackgroundLoader(rate_limiter, tickers, start_date, end_date, benchmark=benchmark_ticker)
     if st.session_state.get('paused', False):
-        return
-
-    # 1. Check Benchmark first
-    if st.session_state.market_prices.empty:
-        with st.sidebar.status(f"📡 Loading Benchmark {benchmark_ticker}..."):
-            data = rate_limiter.download_with_retry([benchmark_ticker], start_date, end_date)
-            if data is not None and not data.empty:
-                prices_series = data.xs('Close', level='Price', axis=1) if 'Price' in data.columns.names else data['Close']
-                st.session_state.market_prices = prices_series.squeeze()
-                st.rerun()
-            else:
-                st.session_state.failed_tickers.add(benchmark_ticker)
-                st.rerun()
+        loader.pause()
+    st.session_state.loader = loader
+    st.session_state.last_config = current_config
 
-    # 2. Check Stocks
-    missing = [t for t in tickers if t not in st.session_state.prices.columns and t not in st.session_state.failed_tickers and t != benchmark_ticker]
-    
-    if missing:
-        t = missing[0]
-        with st.sidebar.status(f"🛰️ Loading {t}..."):
-            data = rate_limiter.download_single_ticker(t, start_date, end_date)
-            if data is not None and not data.empty:
-                # Use a copy to avoid mutation issues
-                df = st.session_state.prices.copy()
-                if df.empty:
-                    st.session_state.prices = pd.DataFrame({t: data})
-                else:
-                    st.session_state.prices[t] = data
-                st.rerun()
-            else:
-                st.session_state.failed_tickers.add(t)
-                st.rerun()
+# Date changes keep what is held: the loader trims to the new window and fetches only the gaps
+loader.set_window(start_date, end_date)
+if not st.session_state.get('paused', False):
+    loader.resume()
 
 # Sidebar: Controls
 st.sidebar.divider()
 if st.sidebar.button("⏸️ Pause Loading" if not st.session_state.get('paused', False) else "▶️ Resume Loading"):
     st.session_state.paused = not st.session_state.get('paused', False)
+    if st.session_state.paused:
+        loader.pause()
+    else:
+        loader.resume()
     st.rerun()
 
-# Run the fetcher
-fetch_next_missing()
-
-# Use state-based data
-prices = st.session_state.prices
-market_prices = st.session_state.market_prices
+# Poll the loader from a fragment: the whole page reruns once per landed batch, not per ticker
+@st.fragment(run_every=None if loader.done else 2)
+def loading_status():
+    loaded_prices, _, failed, version = loader.snapshot()
+    pending = loader.pending()
+    st.caption(f"📈 Loaded: {len(loaded_prices.columns)} | ❌ Failed: {len(failed)} | ⏳ Pending: {len(pending)}")
+    if pending and not st.session_state.get('paused', False):
+        st.caption(f"🛰️ Loading {', '.join(pending[:3])}{'...' if len(pending) > 3 else ''}")
+    if version != st.session_state.seen_version:
+        st.rerun()
+
+# Use loader-based data (mirrored into session state for the rest of the page)
+prices, market_prices, failed_tickers, st.session_state.seen_version = loader.snapshot()
+bars = loader.bars_snapshot()  # Full OHLCV panels from the same downloads (candles, volume)
+st.session_state.prices = prices
+st.session_state.market_prices = market_prices
+st.session_state.failed_tickers = failed_tickers
+
+with st.sidebar:
+    loading_status()
 
 # Handle empty state for the rest of the app
 if prices.empty:
-    st.warning("📥 Terminal initialized. Loading market data ticker-by-ticker...")
+    st.warning("📥 Terminal initialized. Loading market data in the background...")
     st.info("Check the sidebar for progress. Charts will appear as soon as the first ticker arrives.")
     # Show a progress bar for the total selection
     total = len(tickers)
@@ -179,9 +168,7 @@ if prices.empty:
     st.progress(loaded/total if total > 0 else 0)
     st.stop()
 
-# Sidebar display of loaded/failed
-st.sidebar.divider()
-st.sidebar.caption(f"📈 Loaded: {len(prices.columns)} | ❌ Failed: {len(st.session_state.failed_tickers)}")
+# Sidebar display of failed tickers
 if len(st.session_state.failed_tickers) > 0:
     with st.sidebar.expander("View Failed Tickers"):
         st.write(list(st.session_state.failed_tickers))
@@ -225,47 +212,30 @@ tab_port, tab_analysis, tab_global, tab_eco, tab_map, tab_social, tab_opt, tab_a
 
 with tab_global:
     st.subheader("🌍 Global Market Explorer")
-    region = st.selectbox("Select Region / Exchange", [
-        "India (NIFTY 50)", "US (NYSE & NASDAQ)", "EU (London & Euronext)", 
-        "Japan (Tokyo)", "China (Shanghai & Shenzhen)", "Hong Kong"
-    ])
-    
-    # Define Ticker Groups
-    ticker_map = {
-        "India (NIFTY 50)": ["^NSEI", "^BSESN", "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "ICICIBANK.NS", "INFY.NS", "HINDUNILVR.NS", "ITC.NS", "SBIN.NS", "BHARTIARTL.NS", "LICI.NS"],
-        "US (NYSE & NASDAQ)": ["^GSPC", "^IXIC", "^DJI", "AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "BRK-B", "JPM"],
-        "EU (London & Euronext)": ["^FTSE", "^FCHI", "^GDAXI", "SHEL.L", "AZN.L", "MC.PA", "ASML.AS", "SAP.DE", "OR.PA", "HSBA.L"],
-        "Japan (Tokyo)": ["^N225", "7203.T", "6758.T", "9984.T", "6861.T", "8306.T", "8035.T", "4502.T"],
-        "China (Shanghai & Shenzhen)": ["000001.SS", "399001.SZ", "600519.SS", "601398.SS", "601939.SS", "601857.SS", "601288.SS", "000858.SZ"],
-        "Hong Kong": ["^HSI", "0700.HK", "1299.HK", "9988.HK", "3690.HK", "0005.HK", "0939.HK", "2318.HK"]
-    }
-    
-    selected_region_tickers = ticker_map[region]
+    region = st.selectbox("Select Region / Exchange", list(REGION_TICKERS))
     
     with st.spinner(f"Fetching {region} data..."):
         try:
-            regional_data = load_data(selected_region_tickers, start_date, end_date)
+            # Shared by every session and kept fresh by one background worker
+            regional = regional_panels.get(region, start_date, end_date)
+            regional_data = regional["prices"]
             
             if regional_data.empty or len(regional_data) == 0:
                 st.error(f"No data available for {region}. Try selecting a different date range or region.")
             else:
-                # Regional Performance Chart
+                # Regional Performance Chart (normalized to 100)
                 fig_global = go.Figure()
-                # Normalize to 100 for comparison - handle first row safely
-                first_row = regional_data.iloc[0]
-                # Replace zeros to avoid division errors
-                first_row = first_row.replace(0, 1)
-                normalized_data = (regional_data / first_row) * 100
+                normalized_data = regional["normalized"]
                 
-                for t in normalized_data.columns:
-                    fig_global.add_trace(go.Scatter(x=normalized_data.index, y=normalized_data[t], mode='lines', name=t))
+                for t, line in decimate_frame(normalized_data, chart_points, method="minmax").items():
+                    fig_global.add_trace(go.Scatter(x=line.index, y=line, mode='lines', name=t))
                 
                 fig_global.update_layout(height=600, template="plotly_dark", title=f"{region} Performance (Base 100)", yaxis_title="Normalized Price")
                 st.plotly_chart(fig_global, width='stretch')
                 
                 # Heatmap of correlation within the region
                 st.subheader(f"{region} Correlation Matrix")
-                reg_corr = regional_data.pct_change().corr()
+                reg_corr = regional["corr"]
                 fig_reg_corr = go.Figure(data=go.Heatmap(
                     z=reg_corr.values,
                     x=reg_corr.columns,
@@ -280,9 +250,17 @@ with tab_analysis:
     st.subheader("🔍 Deep Asset Analysis")
     target_asset = st.selectbox("Select Asset to Inspect", tickers, key="analysis_asset")
     
+    # Fundamentals for every loaded ticker are fetched in the background (after the prices) and
+    # kept on disk; the page only reads the disk, so a rerun never waits on Yahoo
+    fundamentals_store.prefetch(tickers)
     try:
-        ticker_obj = yf.Ticker(target_asset)
-        info = ticker_obj.info
+        fundamentals = fundamentals_store.get(target_asset)
+        info = fundamentals["info"]
+        if info is None:
+            st.info(f"⏳ Fundamentals for {target_asset} are loading in the background. They will show on a later rerun.")
+            info = {}
+        elif not info:
+            st.warning(f"No fundamentals for {target_asset} (not covered by Yahoo).")
         
         col_a1, col_a2 = st.columns([2, 1])
         
@@ -309,14 +287,11 @@ with tab_analysis:
         with col_a2:
             # Analyst Recommendations (ANR)
             st.markdown("#### ANR: Analyst Sentiment")
-            try:
-                recs = ticker_obj.recommendations
-                if recs is not None and not recs.empty:
-                    st.dataframe(recs.tail(5))
-                else:
-                    st.write("No recent analyst data.")
-            except:
-                st.write("Could not fetch analyst ratings.")
+            recs = fundamentals["recommendations"]
+            if recs is not None and not recs.empty:
+                st.dataframe(recs.tail(5))
+            else:
+                st.write("No recent analyst data.")
                 
             # ESG Data
             st.markdown("#### ESG: Sustainability Score")
@@ -347,17 +322,17 @@ with tab_eco:
         "EUR/USD": "EURUSD=X"
     }
     
+    # One batched request for all indicators, shared by every session for a minute
+    eco_quotes = quote_service.get(eco_indices.values())
     eco_cols = st.columns(3)
     for i, (name, t) in enumerate(eco_indices.items()):
         with eco_cols[i % 3]:
-            try:
-                eco_data = yf.download(t, period="5d")
-                curr = eco_data['Close'].iloc[-1].iloc[0] if isinstance(eco_data['Close'].iloc[-1], pd.Series) else eco_data['Close'].iloc[-1]
-                prev = eco_data['Close'].iloc[-2].iloc[0] if isinstance(eco_data['Close'].iloc[-2], pd.Series) else eco_data['Close'].iloc[-2]
-                change = ((curr - prev)/prev)*100
-                st.metric(name, f"{curr:.2f}", f"{change:.2f}%")
-            except:
+            quote = eco_quotes.get(t)
+            if quote:
+                st.metric(name, f"{quote['price']:.2f}", f"{quote['change_pct']:.2f}%")
+            else:
                 st.metric(name, "N/A", "0%")
+    st.caption(f"Quotes refresh at most every {quote_service.ttl}s")
 with tab_port:
     col_opt, col_graph = st.columns([1, 4])
 
@@ -426,6 +401,7 @@ with tab_port:
             show_bb = st.checkbox("Show Bollinger Bands")
             show_macd = st.checkbox("Show MACD")
             show_candle = st.checkbox("Show Candlesticks")
+            show_volume = st.checkbox("Show Volume")
             
             st.divider()
             st.subheader("BQL: Excel Integration")
@@ -442,35 +418,35 @@ with tab_port:
             
             # Main Chart
             fig = go.Figure()
+            chart_tickers = [t for t in selected_tickers if t in prices.columns]
+            # One pass over every selected ticker; cached per ticker, so toggles redraw instantly
+            bands = indicator_cache.bollinger(prices[chart_tickers], window=20, window_dev=2) if show_bb else None
             
             # Add basic price traces - only for selected tickers
             for t in selected_tickers:
                 if t not in prices.columns:
                     continue
                 
-                if show_candle:
-                    # Need OHLC data for candles (download separately as prices only contains 'Close')
-                    try:
-                        candle_data = yf.download(t, start=start_date, end=end_date, progress=False)
-                        if not candle_data.empty:
-                            fig.add_trace(go.Candlestick(
-                                x=candle_data.index,
-                                open=candle_data['Open'],
-                                high=candle_data['High'],
-                                low=candle_data['Low'],
-                                close=candle_data['Close'],
-                                name=f"{t} (OHLC)"
-                            ))
-                    except:
-                        fig.add_trace(go.Scatter(x=prices.index, y=prices[t], mode='lines', name=t))
+                if show_candle and t in bars.get('Open', {}):
+                    # OHLC comes from the loaded panel, no extra download; long ranges merge into wider candles
+                    candles = resample_ohlc(bars['Open'][t], bars['High'][t], bars['Low'][t], bars['Close'][t],
+                                            max_points=chart_points)
+                    fig.add_trace(go.Candlestick(
+                        x=candles.index,
+                        open=candles['Open'],
+                        high=candles['High'],
+                        low=candles['Low'],
+                        close=candles['Close'],
+                        name=f"{t} (OHLC)"
+                    ))
                 else:
-                    fig.add_trace(go.Scatter(x=prices.index, y=prices[t], mode='lines', name=t))
+                    line = decimate_series(prices[t], chart_points, method="minmax")
+                    fig.add_trace(go.Scatter(x=line.index, y=line, mode='lines', name=t))
                 
                 # Technical Indicators per ticker
                 if show_bb:
-                    indicator_bb = BollingerBands(close=prices[t], window=20, window_dev=2)
-                    bb_upper = indicator_bb.bollinger_hband()
-                    bb_lower = indicator_bb.bollinger_lband()
+                    bb_upper = decimate_series(bands["upper"][t], chart_points, method="minmax")
+                    bb_lower = decimate_series(bands["lower"][t], chart_points, method="minmax")
                     
                     if bb_upper is not None and bb_lower is not None:
                          fig.add_trace(go.Scatter(x=bb_upper.index, y=bb_upper, mode='lines', line=dict(width=1, dash='dot'), name=f"{t} Upper BB"))
@@ -479,12 +455,20 @@ with tab_port:
         fig.update_layout(height=600, template="plotly_dark", title="Asset Prices")
         st.plotly_chart(fig, use_container_width=True)
         
-        # Secondary Charts (RSI/MACD)
-        
+        # Secondary Charts (Volume/RSI/MACD)
+
+        if show_volume and 'Volume' in bars:
+            fig_vol = go.Figure()
+            for t in chart_tickers:
+                if t in bars['Volume']:
+                    volume = decimate_series(bars['Volume'][t], chart_points, method="minmax")
+                    fig_vol.add_trace(go.Bar(x=volume.index, y=volume, name=t))
+            fig_vol.update_layout(height=300, template="plotly_dark", title="Volume", barmode='group')
+            st.plotly_chart(fig_vol, use_container_width=True)
+
         if show_rsi:
             rsi_ticker = st.selectbox("Select Ticker for RSI", prices.columns, key="rsi_select")
-            indicator_rsi = RSIIndicator(close=prices[rsi_ticker], window=14)
-            rsi = indicator_rsi.rsi()
+            rsi = decimate_series(indicator_cache.rsi(prices, window=14)[rsi_ticker], chart_points)
             fig_rsi = go.Figure(go.Scatter(x=rsi.index, y=rsi, name="RSI"))
             fig_rsi.add_hline(y=70, line_dash="dash", line_color="red")
             fig_rsi.add_hline(y=30, line_dash="dash", line_color="green")
@@ -493,10 +477,10 @@ with tab_port:
             
         if show_macd:
             macd_ticker = st.selectbox("Select Ticker for MACD", prices.columns, key="macd_select")
-            indicator_macd = MACD(close=prices[macd_ticker], window_slow=26, window_fast=12, window_sign=9)
-            macd_line = indicator_macd.macd()
-            macd_sig = indicator_macd.macd_signal()
-            macd_hist = indicator_macd.macd_diff()
+            macd = indicator_cache.macd(prices, window_slow=26, window_fast=12, window_sign=9)
+            macd_line = decimate_series(macd["macd"][macd_ticker], chart_points)
+            macd_sig = decimate_series(macd["signal"][macd_ticker], chart_points)
+            macd_hist = decimate_series(macd["hist"][macd_ticker], chart_points, method="minmax")
             
             if macd_line is not None:
                 fig_macd = go.Figure()
@@ -507,7 +491,7 @@ with tab_port:
                 st.plotly_chart(fig_macd, use_container_width=True)
 
     st.subheader("Asset Correlation")
-    corr = prices.pct_change().corr()
+    corr = risk_cache.corr(prices)
     fig_corr = go.Figure(data=go.Heatmap(
         z=corr.values,
         x=corr.columns,
@@ -525,6 +509,17 @@ with tab_opt:
     *   **Hierarchical Risk Parity (HRP)**: A modern ML-based optimization that clusters assets by correlation, ensuring your portfolio is resilient even when markets shift together.
     """)
     
+    if 'opt_weights' not in st.session_state:
+        st.session_state.opt_weights = {}
+
+    cov_estimator = st.radio("Covariance Estimator", ["Full History", "Rolling Window", "EWMA"], horizontal=True,
+                             help="Rolling/EWMA covariance is updated bar by bar as new prices arrive")
+    cov_window = cov_halflife = None
+    if cov_estimator == "Rolling Window":
+        cov_window = st.slider("Window (days)", 20, 504, 126)
+    elif cov_estimator == "EWMA":
+        cov_halflife = st.slider("Halflife (days)", 5, 252, 60)
+
     col1, col2 = st.columns(2)
     
     with col1:
@@ -543,8 +538,10 @@ with tab_opt:
                 view_dict = {view_ticker: view_return / 100.0}
                 st.info(f"Using View: {view_dict}")
                 
-                bl_weights = run_black_litterman(prices, market_prices, view_dict=view_dict)
+                bl_weights = run_black_litterman(prices, market_prices, view_dict=view_dict,
+                                                 cov_window=cov_window, cov_halflife=cov_halflife)
                 if bl_weights:
+                    st.session_state.opt_weights["Black-Litterman"] = dict(bl_weights)
                     st.write(bl_weights)
                     st.bar_chart(pd.Series(bl_weights))
                 else:
@@ -557,46 +554,122 @@ with tab_opt:
         st.write("Groups assets by correlation distance to minimize risk.")
         if st.button("Run HRP"):
             try:
-                hrp_weights = run_hrp(prices)
+                hrp_weights = run_hrp(prices, cov_window=cov_window, cov_halflife=cov_halflife)
+                st.session_state.opt_weights["HRP"] = dict(hrp_weights)
                 st.write(hrp_weights)
                 st.bar_chart(pd.Series(hrp_weights))
             except Exception as e:
                 st.warning(f"HRP failed: {e}")
 
+    st.divider()
+    st.subheader("Efficient Frontier")
+    frontier_points = st.slider("Frontier Points", 20, 200, 50, step=10)
+    if st.button("Compute Efficient Frontier"):
+        with st.spinner(f"Solving {frontier_points} portfolios..."):
+            try:
+                # Large universes spread the target grid over all cores
+                points, frontier_weights = run_efficient_frontier(
+                    prices, n_points=frontier_points, n_workers=None if len(prices.columns) >= 50 else 1)
+                st.session_state.frontier = (points, frontier_weights)
+                best = points["sharpe"].idxmax()
+                st.session_state.opt_weights["Max Sharpe (Frontier)"] = frontier_weights.loc[best].round(6).to_dict()
+            except Exception as e:
+                st.warning(f"Frontier failed: {e}")
+    if 'frontier' in st.session_state:
+        points, frontier_weights = st.session_state.frontier
+        best = points["sharpe"].idxmax()
+        fig_ef = go.Figure(go.Scatter(x=points["volatility"], y=points["return"], mode='lines+markers',
+                                      marker=dict(color=points["sharpe"], colorscale='Viridis', showscale=True,
+                                                  colorbar=dict(title="Sharpe")), name="Frontier"))
+        fig_ef.add_trace(go.Scatter(x=[points.loc[best, "volatility"]], y=[points.loc[best, "return"]], mode='markers',
+                                    marker=dict(size=14, symbol='star', color='orange'), name="Max Sharpe"))
+        fig_ef.update_layout(template="plotly_dark", xaxis_title="Volatility (annual)",
+                             yaxis_title="Expected Return (annual)", title="Efficient Frontier")
+        st.plotly_chart(fig_ef, use_container_width=True)
+
+    st.divider()
+    st.subheader("Walk-Forward Backtest")
+    st.caption("Rebalances on a schedule using only the trailing lookback window, then holds the weights until the next date.")
+    bt_col1, bt_col2, bt_col3, bt_col4 = st.columns(4)
+    bt_strategy = bt_col1.selectbox("Strategy", STRATEGIES)
+    bt_lookback = bt_col2.slider("Lookback (days)", 60, 504, 252, step=21)
+    bt_frequency = bt_col3.selectbox("Rebalance", ["Monthly", "Quarterly", "Weekly"])
+    bt_cost = bt_col4.number_input("Cost (bps)", 0.0, 100.0, 5.0)
+    if st.button("Run Backtest"):
+        with st.spinner(f"Backtesting {bt_strategy}..."):
+            try:
+                bt_caps = load_market_caps(tuple(prices.columns)) if bt_strategy == "Black-Litterman" else None
+                bt = walk_forward(prices, strategy=bt_strategy, lookback=bt_lookback,
+                                  frequency={"Monthly": "M", "Quarterly": "Q", "Weekly": "W"}[bt_frequency],
+                                  cov_halflife=cov_halflife, market_prices=market_prices,
+                                  view_dict={view_ticker: view_return / 100.0}, market_caps=bt_caps,
+                                  cost_bps=bt_cost, n_workers=None if len(prices.columns) >= 50 else 1)
+                stats = bt["stats"]
+                m1, m2, m3, m4, m5 = st.columns(5)
+                m1.metric("CAGR", f"{stats['cagr']*100:.1f}%")
+                m2.metric("Volatility", f"{stats['volatility']*100:.1f}%")
+                m3.metric("Sharpe", f"{stats['sharpe']:.2f}")
+                m4.metric("Max Drawdown", f"{stats['max_drawdown']*100:.1f}%")
+                m5.metric("Avg Turnover", f"{stats['avg_turnover']*100:.1f}%")
+                equity = decimate_series(bt["equity"], chart_points)
+                drawdown = decimate_series(bt["drawdown"], chart_points, method="minmax")
+                fig_bt = go.Figure(go.Scatter(x=equity.index, y=equity, name="Equity"))
+                fig_bt.add_trace(go.Scatter(x=drawdown.index, y=drawdown, name="Drawdown", yaxis="y2",
+                                            fill='tozeroy', line=dict(color='red', width=1)))
+                fig_bt.update_layout(template="plotly_dark", title=f"{bt_strategy} Walk-Forward ({bt_frequency})",
+                                     yaxis=dict(title="Growth of 1"),
+                                     yaxis2=dict(title="Drawdown", overlaying='y', side='right', tickformat='.0%'))
+                st.plotly_chart(fig_bt, use_container_width=True)
+                st.bar_chart(bt["turnover"].rename("Turnover"))
+            except Exception as e:
+                st.warning(f"Backtest failed: {e}")
+
     st.divider()
     st.subheader("Monte Carlo Simulation (Value at Risk)")
+    weight_options = ["Equal-Weight"] + list(st.session_state.opt_weights.keys())
+    mc_weighting = st.selectbox("Portfolio Weights", weight_options,
+                                help="Run Black-Litterman, HRP or the frontier above to simulate their allocation")
+    mc_weights = st.session_state.opt_weights.get(mc_weighting)
     st.markdown(f"""
     **What is this?**
-    We simulate thousands of possible future price paths for your **Entire Portfolio** (Equal-Weighted).
+    We simulate thousands of possible future price paths for your **Entire Portfolio** ({mc_weighting}).
     *   **Assets Included**: {", ".join(tickers)}
     *   **VaR (Value at Risk)**: The maximum loss you might expect with 95% confidence.
     *   **CVaR (Conditional VaR)**: The average loss in the worst 5% of cases (a more conservative risk measure).
     """)
     
-    sim_runs = st.slider("Simulations", 1000, 5000, 10000)
+    sim_runs = st.slider("Simulations", 1000, 1000000, 10000, step=1000)
     
     if st.button("Run Simulation"):
-        sims = run_monte_carlo(prices, simulations=sim_runs)
+        # Risk numbers stream through quantile sketches, so no path is stored;
+        # only a small sample of paths is drawn for the chart
+        risk = run_monte_carlo(prices, simulations=sim_runs, dtype=np.float32, weights=mc_weights,
+                               return_paths=False, n_workers=None if sim_runs >= 50000 else 1)
+        sims = run_monte_carlo(prices, simulations=min(10000, sim_runs), dtype=np.float32,
+                               weights=mc_weights)
         
-        # Plot Trajectories
+        # Plot Trajectories as percentile fan bands plus a handful of sample paths
+        steps, fan = fan_bands(sims, max_points=chart_points)
         fig_mc = go.Figure()
-        # Show only first 100 traces
-        for i in range(min(1000, sim_runs)):
-            fig_mc.add_trace(go.Scatter(y=sims[i,:], mode='lines', line=dict(width=1), opacity=0.3, showlegend=False))
-        fig_mc.update_layout(title="Portfolio Monte Carlo Pathways", showlegend=False, template="plotly_dark")
+        for lo, hi, alpha in [(5, 95, 0.2), (25, 75, 0.35)]:
+            fig_mc.add_trace(go.Scatter(x=steps, y=fan[hi], mode='lines', line=dict(width=0), showlegend=False))
+            fig_mc.add_trace(go.Scatter(x=steps, y=fan[lo], mode='lines', line=dict(width=0), fill='tonexty',
+                                        fillcolor=f"rgba(0, 150, 255, {alpha})", name=f"{lo}-{hi}th pct"))
+        for i in range(min(20, sims.shape[0])):
+            fig_mc.add_trace(go.Scatter(x=steps, y=sims[i, steps], mode='lines', line=dict(width=1),
+                                        opacity=0.3, showlegend=False))
+        fig_mc.add_trace(go.Scatter(x=steps, y=fan[50], mode='lines', line=dict(width=2, color='orange'), name="Median"))
+        fig_mc.update_layout(title="Portfolio Monte Carlo Pathways", template="plotly_dark")
         st.plotly_chart(fig_mc)
         
-        # ... existing stats code ...
-        final_values = sims[:, -1]
-        var_95 = np.percentile(final_values, 5)
-        cvar_95 = final_values[final_values <= var_95].mean()
-        
-        col_m1, col_m2 = st.columns(2)
-        col_m1.metric("VaR (95%)", f"${var_95:,.2f}")
-        col_m2.metric("CVaR (95%)", f"${cvar_95:,.2f}")
+        col_m1, col_m2, col_m3 = st.columns(3)
+        col_m1.metric("VaR (95%)", f"${risk['var_95']:,.2f}")
+        col_m2.metric("CVaR (95%)", f"${risk['cvar_95']:,.2f}")
+        col_m3.metric("Max Drawdown (95%)", f"{risk['drawdown_95']*100:.1f}%")
         
         # Histogram
-        fig_hist = go.Figure(data=[go.Histogram(x=final_values, nbinsx=50)])
+        counts, edges = risk["histogram"]
+        fig_hist = go.Figure(data=[go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges))])
         fig_hist.update_layout(title="Distribution of Final Portfolio Values", template="plotly_dark")
         st.plotly_chart(fig_hist)
 
@@ -612,9 +685,10 @@ with tab_ai:
             if not HAS_TF:
                 st.error("TensorFlow is not installed. Please install it to use LSTM.")
             else:
-                with st.spinner("Training Neural Network (20 Epochs)..."):
+                # First run trains 20 epochs; later runs reuse the saved model and fine-tune on new bars
+                with st.spinner("Training / updating Neural Network..."):
                     try:
-                        pred_price, pred_log = run_lstm_prediction(prices[target_stock])
+                        pred_price, pred_log = run_lstm_prediction(prices[target_stock], ticker=target_stock)
                         
                         if pred_price == 0.0:
                              st.warning("Not enough data to train.")
@@ -633,4 +707,34 @@ with tab_ai:
         if st.button("Analyze Sentiment"):
             with st.spinner("Analyzing... (First run downloads model ~400MB)"):
                 sentiment = get_finbert_sentiment(target_stock)
-                st.info(f"Market Sentiment for {target_stock}: **{sentiment}**")
\ No newline at end of file
+                st.info(f"Market Sentiment for {target_stock}: **{sentiment}**")
+
+        if st.button("Score Universe Headlines"):
+            with st.spinner(f"Fetching and scoring headlines for {len(prices.columns)} tickers..."):
+                try:
+                    # All headlines go through FinBERT in batches; repeats come from the score cache
+                    headlines = load_headlines(list(prices.columns))
+                    st.dataframe(score_headlines(headlines).style.format({"Net Sentiment": "{:+.2f}"}))
+                except Exception as e:
+                    st.error(f"Sentiment Error: {e}")
+
+    st.divider()
+    st.markdown("### Batch Forecast (All Loaded Tickers)")
+    st.caption("One shared LSTM across the universe: one training job and one forward pass instead of one per ticker.")
+    # Forecasts are kept for the session until the price panel changes
+    panel_key = panel_fingerprint(prices)
+    if st.button("Forecast Universe"):
+        if not HAS_TF:
+            st.error("TensorFlow is not installed. Please install it to use LSTM.")
+        else:
+            with st.spinner(f"Training / updating shared model on {len(prices.columns)} tickers..."):
+                try:
+                    st.session_state.batch_forecast = (panel_key, run_batch_lstm_forecast(prices))
+                except Exception as e:
+                    st.error(f"Batch Forecast Error: {e}")
+    cached_key, batch_forecast = st.session_state.get('batch_forecast', (None, None))
+    if batch_forecast is not None:
+        if cached_key != panel_key:
+            st.caption("Prices have changed since this run; click Forecast Universe to refresh.")
+        st.dataframe(batch_forecast.sort_values("Change %", ascending=False).style.format(
+            {"Current Price": "{:.2f}", "Forecast": "{:.2f}", "Log Return": "{:.5f}", "Change %": "{:+.2f}%"}))
\ No newline at end of file
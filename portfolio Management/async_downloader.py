@@ -0,0 +1,137 @@
+"""
+Async concurrent downloader for Yahoo Finance
+Groups tickers into multi-symbol requests, as download_in_batches does, and keeps several
+of them in flight under the limiter's token bucket, with jittered exponential backoff per
+host when Yahoo answers 429
+"""
+import asyncio
+import threading
+import time
+import pandas as pd
+from price_store import BAR_FIELDS, MAX_EMPTY_GAP, to_day
+from rate_limiter import is_rate_limit_error, backoff_delay
+
+# yfinance spreads calls over query1/query2, which share one quota
+YAHOO_HOST = "finance.yahoo.com"
+
+
+def run_sync(coro):
+    """Run a coroutine from sync code, even if the calling thread already has a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("value", asyncio.run(coro)))
+    worker.start()
+    worker.join()
+    return result["value"]
+
+
+class AsyncDownloader:
+    def __init__(self, limiter, max_in_flight=4, batch_size=5, max_retries=4, base_backoff=5.0, max_backoff=120.0):
+        self.limiter = limiter
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size  # Tickers per request; each request costs one token
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.blocked_until = {}  # host -> monotonic time before which nobody calls it
+
+    def _backoff(self, host, attempt):
+        """Push the host's next allowed call out by a jittered exponential delay"""
+        delay = backoff_delay(attempt, self.base_backoff, self.max_backoff)
+        self.blocked_until[host] = max(self.blocked_until.get(host, 0), time.monotonic() + delay)
+
+    async def _wait_for_host(self, host):
+        while True:
+            wait = self.blocked_until.get(host, 0) - time.monotonic()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _request(self, semaphore, call, *args, host=YAHOO_HOST):
+        """One throttled limiter call (retried with backoff on 429); None if every attempt failed"""
+        for attempt in range(self.max_retries):
+            async with semaphore:
+                await self._wait_for_host(host)
+                await self.limiter.bucket.acquire_async()
+                try:
+                    return await asyncio.to_thread(call, *args)
+                except Exception as e:
+                    if is_rate_limit_error(e):
+                        self._backoff(host, attempt)
+                    elif attempt == self.max_retries - 1:
+                        return None
+        return None
+
+    @staticmethod
+    def _split(data, tickers):
+        """{ticker: bars} from a grouped multi-ticker answer; tickers it has no closes for are None"""
+        bars = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                frame = data[ticker] if ticker in data.columns.get_level_values(0) else None
+            else:
+                frame = data if len(tickers) == 1 else None
+            if frame is not None and 'Close' in frame.columns and not frame['Close'].dropna().empty:
+                bars[ticker] = frame.reindex(columns=BAR_FIELDS)
+            else:
+                bars[ticker] = None
+        return bars
+
+    async def _fetch(self, semaphore, tickers, start, end):
+        """{ticker: OHLCV bars or None} for one batch of tickers over [start, end)"""
+        data = await self._request(semaphore, self.limiter._download_batch, list(tickers), start, end)
+        if data is not None and not data.empty:
+            return self._split(data, tickers)
+        if data is not None and to_day(end) - to_day(start) <= MAX_EMPTY_GAP:
+            # A short gap with no trading days: an empty answer for every ticker
+            return {t: pd.DataFrame(columns=BAR_FIELDS, dtype=float) for t in tickers}
+        # The batch failed outright: fall back to one request per ticker
+        singles = await asyncio.gather(*(self._request(semaphore, self.limiter._history_once, t, start, end)
+                                         for t in tickers))
+        return dict(zip(tickers, singles))
+
+    async def fetch_all(self, requests):
+        """Fetch (tickers, start, end) batches concurrently; returns their {ticker: bars} in order"""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        return await asyncio.gather(*(self._fetch(semaphore, t, s, e) for t, s, e in requests))
+
+    def _batches(self, tickers, start, end):
+        """(tickers, start, end) requests: tickers missing the same span share a request"""
+        store = self.limiter.store
+        groups = {}
+        for ticker in tickers:
+            if store is None:
+                span = (start, end)
+            else:
+                gaps = store.missing_ranges(ticker, start, end)
+                if not gaps:
+                    continue
+                span = (gaps[0][0], gaps[-1][1])
+            groups.setdefault(span, []).append(ticker)
+        return [(group[i:i + self.batch_size], s, e) for (s, e), group in groups.items()
+                for i in range(0, len(group), self.batch_size)]
+
+    def download(self, tickers, start, end):
+        """Close prices for [start, end) as a DataFrame, only fetching ranges missing from the store"""
+        store = self.limiter.store
+        requests = self._batches(list(dict.fromkeys(tickers)), start, end)
+        results = run_sync(self.fetch_all(requests)) if requests else []
+
+        all_data = {}
+        for (_, req_start, req_end), fetched in zip(requests, results):
+            for ticker, bars in fetched.items():
+                if bars is None:
+                    continue
+                if store is not None:
+                    store.write(ticker, bars, req_start, req_end)
+                elif not bars.empty:
+                    all_data[ticker] = bars['Close']
+        if store is not None:
+            for ticker in tickers:
+                closes = store.read(ticker, start, end)
+                if not closes.empty:
+                    all_data[ticker] = closes
+        return pd.DataFrame(all_data)
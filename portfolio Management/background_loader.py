@@ -0,0 +1,181 @@
+"""
+Background price loader for the terminal
+Fills the price panel batch by batch on a worker thread while the page renders
+whatever is already loaded. Full OHLCV bars come in the same requests as the closes,
+so candles and volume views need no extra downloads
+"""
+import threading
+import pandas as pd
+from price_store import date_gaps, to_day, merge_ranges
+
+
+class BackgroundLoader:
+    def __init__(self, limiter, tickers, start, end, benchmark=None, batch_size=5):
+        self.limiter = limiter
+        self.tickers = list(tickers)
+        self.benchmark = benchmark
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.run_lock = threading.Lock()  # Guards starting/retiring the worker thread
+        self.stop_event = threading.Event()  # Set once the loader is replaced; its thread then exits
+        self.paused = False
+        self.running = False
+
+        self.bars = {}  # Field ("Open", ..., "Volume") -> date x ticker panel
+        self.prices = pd.DataFrame()  # Same object as bars["Close"]
+        self.market_prices = pd.Series(dtype=float)
+        self.failed = set()
+        self.version = 0  # Bumped whenever a batch lands, so the page knows to redraw
+        self.window = (to_day(start), to_day(end))
+        self.held = [self.window]  # Date ranges the loaded columns already cover
+
+    # ---- control (called from the script thread) ----
+
+    def ensure_running(self):
+        with self.run_lock:
+            if not self.running and not self.stop_event.is_set():
+                self.running = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.ensure_running()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def set_window(self, start, end):
+        """Trim held data to a new date window; the worker then fetches only the uncovered gaps"""
+        window = (to_day(start), to_day(end))
+        with self.lock:
+            if window == self.window:
+                return
+            self.window = window
+            self.bars = {field: self._trim(panel) for field, panel in self.bars.items()}
+            self.prices = self.bars.get("Close", pd.DataFrame())
+            self.market_prices = self._trim(self.market_prices)
+            self.held = [(max(a, window[0]), min(b, window[1]))
+                         for a, b in self.held if a < window[1] and b > window[0]]
+            if self.prices.empty:
+                # No overlap: drop the emptied columns too, so every ticker (and the benchmark)
+                # is pending again and the whole window is fetched
+                self.bars, self.prices = {}, pd.DataFrame()
+                self.market_prices = pd.Series(dtype=float)
+                self.held = [window]
+            self.version += 1
+        self.ensure_running()
+
+    def snapshot(self):
+        """Consistent view of (prices, market_prices, failed, version) for one script run"""
+        with self.lock:
+            return self.prices, self.market_prices, set(self.failed), self.version
+
+    def bars_snapshot(self):
+        """{field: date x ticker panel} of the full OHLCV bars held so far"""
+        with self.lock:
+            return dict(self.bars)
+
+    def pending(self):
+        with self.lock:
+            return [t for t in self.tickers
+                    if t not in self.prices.columns and t not in self.failed and t != self.benchmark]
+
+    @property
+    def done(self):
+        with self.lock:
+            has_gaps = not self.prices.empty and bool(date_gaps(self.held, *self.window))
+        return not self.pending() and not has_gaps and self._benchmark_settled()
+
+    # ---- worker ----
+
+    def _trim(self, data):
+        if data.empty:
+            return data
+        return data.loc[self.window[0]:self.window[1] - pd.Timedelta(days=1)]
+
+    def _merge_bars(self, data, fill_gap):
+        """Fold a (Price, Ticker) frame into the held panels: new dates (fill_gap) or new tickers"""
+        for field in data.columns.get_level_values(0).unique():
+            panel = self.bars.get(field)
+            if panel is None or panel.empty:
+                self.bars[field] = data[field]
+            elif fill_gap:
+                self.bars[field] = panel.combine_first(data[field])
+            else:
+                self.bars[field] = panel.join(data[field], how='outer')
+        self.prices = self.bars.get("Close", pd.DataFrame())
+
+    def _benchmark_settled(self):
+        return self.benchmark is None or not self.market_prices.empty or self.benchmark in self.failed
+
+    def _benchmark_closes(self, start, end):
+        data = self.limiter.download_with_retry([self.benchmark], start, end)
+        if data is None or data.empty:
+            return None
+        closes = data.xs('Close', level='Price', axis=1) if 'Price' in data.columns.names else data['Close']
+        return closes.squeeze()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if self.paused or not self._step():
+                # Retire while paused or idle (unless work slipped in meanwhile): no thread is kept
+                # waiting, and set_window/resume start a new one
+                with self.run_lock:
+                    if self.paused or self.done:
+                        self.running = False
+                        return
+        with self.run_lock:
+            self.running = False
+
+    def _step(self):
+        """Load one unit of work (benchmark, one date gap, or one batch); False when idle"""
+        with self.lock:
+            window = self.window
+            loaded = list(self.prices.columns)
+            gaps = date_gaps(self.held, *window) if loaded else []
+        missing = self.pending()
+
+        if not self._benchmark_settled():
+            closes = self._benchmark_closes(*window)
+            with self.lock:
+                if window != self.window or self.stop_event.is_set():
+                    return True
+                if closes is not None and not closes.empty:
+                    self.market_prices = closes
+                else:
+                    self.failed.add(self.benchmark)
+                self.version += 1
+            return True
+
+        if gaps:
+            gap_start, gap_end = gaps[0]
+            delta = self.limiter.download_in_batches(loaded, gap_start, gap_end, ohlcv=True)
+            bench = self._benchmark_closes(gap_start, gap_end) if not self.market_prices.empty else None
+            with self.lock:
+                if window != self.window or self.stop_event.is_set():
+                    return True
+                if not delta.empty:
+                    self._merge_bars(delta, fill_gap=True)
+                if bench is not None:
+                    self.market_prices = self.market_prices.combine_first(bench)
+                self.held = merge_ranges(self.held + [(gap_start, gap_end)])
+                self.version += 1
+            return True
+
+        if missing:
+            batch = missing[:self.batch_size]
+            data = self.limiter.download_in_batches(batch, *window, ohlcv=True)
+            with self.lock:
+                if window != self.window or self.stop_event.is_set():
+                    return True
+                loaded = data['Close'].columns if not data.empty else []
+                if not data.empty:
+                    self._merge_bars(data, fill_gap=False)
+                self.failed.update(t for t in batch if t not in loaded)
+                self.version += 1
+            return True
+
+        return False
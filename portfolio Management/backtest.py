@@ -0,0 +1,145 @@
+"""
+Walk-forward backtester for the allocation algorithms
+On each rebalance date the strategy sees only the trailing `lookback` bars; its weights
+are held (drifting with prices) until the next rebalance. The rolling covariance is carried
+from one window to the next instead of being recomputed, and the per-date optimizations,
+which are independent of each other, can run in a process pool
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from incremental_cov import IncrementalCovariance
+from algorithms import run_hrp, run_black_litterman
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ["HRP", "Black-Litterman", "Equal-Weight"]
+
+
+def rebalance_dates(index, lookback, frequency="M"):
+    """First trading day of each period (pandas offset alias) once `lookback` bars are available"""
+    eligible = index[lookback:]
+    if len(eligible) == 0:
+        return eligible
+    periods = eligible.to_period(frequency)
+    return eligible[np.r_[True, periods[1:] != periods[:-1]]]
+
+
+def rolling_covariances(returns, dates, lookback, halflife=None):
+    """
+    {date: annualized covariance of the window ending on `date`}; one pass over the
+    history, so each bar costs O(N^2) however many rebalances there are
+    """
+    acc = IncrementalCovariance(returns.shape[1], window=None if halflife else lookback, halflife=halflife)
+    wanted = set(dates)
+    covs = {}
+    for date, row in zip(returns.index, returns.values):
+        acc.update(row)
+        if date in wanted:
+            covs[date] = pd.DataFrame(acc.cov * 252, index=returns.columns, columns=returns.columns)
+    return covs
+
+
+def _strategy_weights(strategy, cov, window_prices, window_market, view_dict, market_caps):
+    """Target weights for one rebalance date (runs in a worker process)"""
+    if strategy == "HRP":
+        weights = run_hrp(window_prices, cov_matrix=cov)
+    elif strategy == "Black-Litterman":
+        weights = run_black_litterman(window_prices, window_market, view_dict=view_dict,
+                                      cov_matrix=cov, market_caps=market_caps)
+    else:
+        weights = {t: 1.0 / len(cov) for t in cov.columns}
+    weights = pd.Series(weights, dtype=float).reindex(cov.columns).fillna(0.0)
+    total = weights.sum()
+    # An optimizer that fails returns {}: stay equal-weight rather than drop out of the market
+    return weights / total if total > 0 else pd.Series(1.0 / len(cov), index=cov.columns)
+
+
+def _tradable_panel(prices):
+    """
+    Forward-filled panel from the first date on which every ticker has a price.
+    Only tickers with no price at all are dropped (and logged), so a holiday on one
+    exchange at the start does not remove that market from the backtest.
+    """
+    empty = prices.columns[prices.isna().all()]
+    if len(empty):
+        logger.warning(f"Backtest drops tickers with no prices: {list(empty)}")
+    prices = prices.drop(columns=empty).ffill()
+    complete = prices.notna().all(axis=1)
+    if not complete.any():
+        return prices.iloc[0:0]
+    return prices.loc[complete.idxmax():]
+
+
+def _drawdown(equity):
+    return equity / equity.cummax() - 1
+
+
+def walk_forward(prices, strategy="HRP", lookback=252, frequency="M", cov_halflife=None,
+                 market_prices=None, view_dict=None, market_caps=None, cost_bps=0.0, n_workers=1):
+    """
+    Walk-forward backtest of `strategy` over the price panel.
+    The backtest starts on the first date every ticker has a price (gaps after it are
+    forward-filled); tickers with no prices at all are dropped. `cost_bps` is charged on
+    traded notional at each rebalance. n_workers > 1 solves rebalance dates in a process
+    pool (None = one per core). Black-Litterman needs `market_prices` and uses today's
+    `market_caps` for its prior (as the live tab does).
+    Returns a dict with equity, returns, drawdown, weights, turnover and summary stats.
+    """
+    prices = _tradable_panel(prices)
+    returns = prices.pct_change().iloc[1:]
+    dates = rebalance_dates(returns.index, lookback, frequency)
+    if len(dates) == 0:
+        raise ValueError(f"Need more than {lookback} bars to backtest")
+
+    covs = rolling_covariances(returns, dates, lookback, cov_halflife)
+    jobs = []
+    for date in dates:
+        start = returns.index.get_loc(date) + 1 - lookback
+        window = prices.iloc[start:returns.index.get_loc(date) + 2]
+        market = market_prices.loc[window.index[0]:date] if market_prices is not None else None
+        jobs.append((strategy, covs[date], window, market, view_dict, market_caps))
+
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            targets = list(pool.map(_strategy_weights, *zip(*jobs)))
+    else:
+        targets = [_strategy_weights(*job) for job in jobs]
+    targets = pd.DataFrame(targets, index=dates)
+
+    # Hold each target from the bar after its rebalance date, letting weights drift
+    daily = pd.Series(0.0, index=returns.index)
+    turnover = pd.Series(0.0, index=dates)
+    held = pd.Series(0.0, index=prices.columns)
+    positions = [returns.index.get_loc(d) + 1 for d in dates] + [len(returns)]
+    for date, begin, end in zip(dates, positions[:-1], positions[1:]):
+        target = targets.loc[date]
+        turnover[date] = (target - held).abs().sum() / 2
+        if begin >= end:
+            held = target
+            continue
+        growth = (1 + returns.iloc[begin:end]).cumprod()
+        value = growth.values @ target.values
+        segment = np.diff(np.r_[1.0, value]) / np.r_[1.0, value[:-1]]
+        segment[0] -= 2 * turnover[date] * cost_bps / 1e4
+        daily.iloc[begin:end] = segment
+        held = target * growth.iloc[-1] / value[-1]
+
+    daily = daily.iloc[positions[0]:]
+    equity = (1 + daily).cumprod()
+    drawdown = _drawdown(equity)
+    years = len(daily) / 252
+    vol = daily.std() * np.sqrt(252)
+    stats = {
+        "total_return": equity.iloc[-1] - 1 if len(equity) else 0.0,
+        "cagr": equity.iloc[-1] ** (1 / years) - 1 if years > 0 else 0.0,
+        "volatility": vol,
+        "sharpe": daily.mean() * 252 / vol if vol > 0 else np.nan,
+        "max_drawdown": drawdown.min() if len(drawdown) else 0.0,
+        "avg_turnover": turnover.iloc[1:].mean() if len(turnover) > 1 else 0.0,
+    }
+    return {"equity": equity, "returns": daily, "drawdown": drawdown, "weights": targets,
+            "turnover": turnover, "stats": stats}
@@ -0,0 +1,203 @@
+"""
+Benchmark suite for the portfolio algorithms
+Times run_monte_carlo, run_hrp, run_black_litterman and run_lstm_prediction on synthetic
+correlated price panels across universe size, history length and path count, recording
+wall time and peak (tracemalloc) memory. Results are written as JSON so two commits can
+be compared:
+
+    python benchmark_algorithms.py --quick --out base.json
+    python benchmark_algorithms.py --quick --out head.json --compare base.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from algorithms import run_monte_carlo, run_hrp, run_black_litterman, run_lstm_prediction, HAS_TF
+from risk_cache import risk_cache
+from hrp import hrp_engine
+
+# Parameter grids per algorithm: full sweep and a quick one for local checks / CI
+SWEEPS = {
+    "monte_carlo": {
+        "full": {"n_assets": [10, 50, 200], "n_days": [252, 1260], "simulations": [1000, 10000, 50000]},
+        "quick": {"n_assets": [10, 50], "n_days": [252], "simulations": [1000, 10000]},
+    },
+    "hrp": {
+        "full": {"n_assets": [50, 200, 1000], "n_days": [252, 1260, 2520]},
+        "quick": {"n_assets": [50, 200], "n_days": [252]},
+    },
+    "black_litterman": {
+        "full": {"n_assets": [10, 50, 200], "n_days": [252, 1260, 2520]},
+        "quick": {"n_assets": [10, 50], "n_days": [252]},
+    },
+    "lstm": {
+        "full": {"n_days": [500, 1260, 2520], "epochs": [5]},
+        "quick": {"n_days": [500], "epochs": [2]},
+    },
+}
+
+
+def synthetic_panel(n_assets, n_days, seed=0, n_factors=3):
+    """Correlated GBM prices (factor model) on business days, plus a market index"""
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0.5, 0.3, size=(n_factors, n_assets))
+    factors = rng.normal(0, 0.008, size=(n_days, n_factors))
+    idio = rng.normal(0, 0.01, size=(n_days, n_assets)) * rng.uniform(0.5, 2.0, size=n_assets)
+    returns = 0.0003 + factors @ loadings + idio
+    index = pd.bdate_range("2010-01-04", periods=n_days)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                          columns=[f"SYN{i:04d}" for i in range(n_assets)])
+    # Demeaned so the market's realised drift (and so BL's implied risk aversion) is positive
+    market_returns = 0.0005 + factors.mean(axis=1) - factors.mean()
+    market = pd.Series(100 * np.exp(np.cumsum(market_returns)), index=index, name="^GSPC")
+    return prices, market
+
+
+def _case(name, params, seed):
+    """Zero-argument callable for one benchmark point (inputs built outside the timing)"""
+    prices, market = synthetic_panel(params.get("n_assets", 1), params["n_days"], seed)
+    if name == "monte_carlo":
+        return lambda: run_monte_carlo(prices, simulations=params["simulations"], time_horizon=252,
+                                       seed=seed, return_paths=False)
+    if name == "hrp":
+        return lambda: run_hrp(prices)
+    if name == "black_litterman":
+        caps = {t: 1e9 * (i + 1) for i, t in enumerate(prices.columns)}
+        views = {prices.columns[0]: 0.10}
+        return lambda: run_black_litterman(prices, market, view_dict=views, market_caps=caps)
+    if name == "lstm":
+        if not HAS_TF:
+            return None
+        return lambda: run_lstm_prediction(prices.iloc[:, 0], epochs=params["epochs"], registry=None)
+    raise ValueError(f"Unknown benchmark {name}")
+
+
+def _reset_caches():
+    # Each run measures the cold computation, not a cache hit from the previous repeat
+    risk_cache.clear()
+    hrp_engine.clear()
+
+
+def measure(fn, repeat=3):
+    """Wall times of `repeat` untraced runs, then peak traced memory from one more run"""
+    times = []
+    for _ in range(repeat):
+        _reset_caches()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    _reset_caches()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"times_s": times, "median_s": float(np.median(times)), "min_s": min(times),
+            "peak_mb": peak / 1024 ** 2}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(names=None, quick=False, repeat=3, seed=0, log=print):
+    """Run every sweep point of the selected benchmarks; returns the JSON-ready report"""
+    results = []
+    for name in names or list(SWEEPS):
+        grid = SWEEPS[name]["quick" if quick else "full"]
+        for values in itertools.product(*grid.values()):
+            params = dict(zip(grid, values))
+            fn = _case(name, params, seed)
+            if fn is None:
+                log(f"{name} {params}: skipped (TensorFlow not installed)")
+                continue
+            stats = measure(fn, repeat)
+            results.append({"name": name, "params": params, **stats})
+            log(f"{name} {params}: {stats['median_s']:.3f}s median, {stats['peak_mb']:.1f} MB peak")
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "quick": quick, "repeat": repeat, "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def _result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare_results(baseline, current, threshold=0.25):
+    """
+    Rows for benchmark points present in both reports, with time and memory ratios
+    (current / baseline). A point regresses when its median time or peak memory grows
+    by more than `threshold`.
+    """
+    base = {_result_key(r): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = base.get(_result_key(result))
+        if old is None:
+            continue
+        time_ratio = result["median_s"] / max(old["median_s"], 1e-9)
+        mem_ratio = result["peak_mb"] / max(old["peak_mb"], 1e-9)
+        rows.append({"name": result["name"], "params": result["params"],
+                     "time_ratio": time_ratio, "mem_ratio": mem_ratio,
+                     "regression": time_ratio > 1 + threshold or mem_ratio > 1 + threshold})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", help="comma-separated subset of: " + ", ".join(SWEEPS))
+    parser.add_argument("--quick", action="store_true", help="small sweep for quick checks")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per point")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown / memory growth counted as a regression")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    for name in names or []:
+        if name not in SWEEPS:
+            parser.error(f"unknown benchmark {name!r}")
+    report = run_suite(names, args.quick, args.repeat, args.seed, log=lambda m: print(m, file=sys.stderr))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            rows = compare_results(json.load(f), report, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['name']:<16} {json.dumps(row['params']):<55} time x{row['time_ratio']:.2f} "
+                  f"mem x{row['mem_ratio']:.2f}  {flag}", file=sys.stderr)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
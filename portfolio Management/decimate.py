@@ -0,0 +1,112 @@
+"""
+Server-side down-sampling between the data and Plotly
+A chart a couple of thousand pixels wide cannot show more points than that per trace,
+so long histories are reduced (LTTB or min-max buckets, OHLC aggregation for candles)
+and simulation paths are drawn as percentile fan bands instead of one trace per path
+"""
+import numpy as np
+import pandas as pd
+
+# Default points per trace: about the pixel width of a full-width chart
+MAX_POINTS = 2000
+
+
+def lttb_indices(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets: positions of `n_out` points that keep the visual shape.
+    Always keeps the first and last point.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < n_out - 1 else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the area of the triangle (previous point, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Positions of the min and max of each of n_out/2 equal buckets (keeps every spike)"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    valid = offsets < n
+    lows = np.nanargmin(padded[valid], axis=1) + offsets[valid]
+    highs = np.nanargmax(padded[valid], axis=1) + offsets[valid]
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def decimate_series(series, max_points=MAX_POINTS, method="lttb"):
+    """At most ~max_points of a Series (NaNs dropped), chosen by 'lttb' or 'minmax'"""
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    if method == "minmax":
+        positions = minmax_indices(series.values, max_points)
+    else:
+        x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else None
+        positions = lttb_indices(series.values, max_points, x=x)
+    return series.iloc[positions]
+
+
+def decimate_frame(frame, max_points=MAX_POINTS, method="lttb"):
+    """{column: decimated Series}; each column keeps its own most telling points"""
+    return {col: decimate_series(frame[col], max_points, method) for col in frame.columns}
+
+
+def resample_ohlc(open_, high, low, close, volume=None, max_points=MAX_POINTS):
+    """
+    Merge consecutive bars into at most max_points candles: first open, highest high,
+    lowest low, last close and summed volume per bucket. Returns a DataFrame indexed by
+    each bucket's first date.
+    """
+    bars = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close})
+    if volume is not None:
+        bars["Volume"] = volume
+    bars = bars.dropna(subset=["Close"])
+    if len(bars) <= max_points:
+        return bars
+    bucket = np.arange(len(bars)) * max_points // len(bars)
+    grouped = bars.groupby(bucket)
+    merged = pd.DataFrame({"Open": grouped["Open"].first(), "High": grouped["High"].max(),
+                           "Low": grouped["Low"].min(), "Close": grouped["Close"].last()})
+    if volume is not None:
+        merged["Volume"] = grouped["Volume"].sum()
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket) > 0])
+    merged.index = bars.index[starts]
+    return merged
+
+
+def fan_bands(paths, percentiles=(5, 25, 50, 75, 95), max_points=MAX_POINTS):
+    """
+    Percentiles across simulated paths: (steps, {percentile: array over steps}).
+    Bands are smooth, so steps beyond max_points are simply strided.
+    """
+    paths = np.asarray(paths)
+    steps = np.arange(paths.shape[1])
+    if len(steps) > max_points:
+        steps = np.unique(np.linspace(0, len(steps) - 1, max_points).astype(np.int64))
+    values = np.percentile(paths[:, steps], percentiles, axis=0)
+    return steps, dict(zip(percentiles, values))
@@ -0,0 +1,83 @@
+"""
+Efficient frontier sweep
+Solves a grid of target returns (or target volatilities) on the same EfficientFrontier
+inputs. Each worker compiles the parameterized problem once and walks its contiguous
+slice of the grid, so later solves only swap the target parameter and start from the
+neighbouring solution (with solvers that support warm starts, e.g. OSQP)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+from pypfopt import EfficientFrontier, objective_functions
+
+# The interior-point Clarabel was both faster and more reliable here than warm-started
+# OSQP at the accuracy the chart needs; pass solver="OSQP" to warm-start from the previous point
+FRONTIER_SOLVER = "CLARABEL" if "CLARABEL" in cp.installed_solvers() else None
+
+
+def _new_frontier(mu, cov, weight_bounds, l2_gamma, solver):
+    ef = EfficientFrontier(mu, cov, weight_bounds=weight_bounds, solver=solver)
+    if l2_gamma:
+        ef.add_objective(objective_functions.L2_reg, gamma=l2_gamma)
+    return ef
+
+
+def _sweep_slice(mu, cov, targets, sweep, weight_bounds, l2_gamma, solver):
+    """Weights for each target on one EfficientFrontier instance (NaN row where infeasible)"""
+    ef = _new_frontier(mu, cov, weight_bounds, l2_gamma, solver)
+    solve = ef.efficient_return if sweep == "return" else ef.efficient_risk
+    rows = []
+    for target in targets:
+        try:
+            # Same objective and constraints: only the target parameter changes between solves
+            solve(target)
+            rows.append(ef.weights.copy())
+        except Exception:
+            rows.append(np.full(len(mu), np.nan))
+    return np.array(rows)
+
+
+def _target_grid(mu, cov, n_points, sweep, weight_bounds, l2_gamma, solver):
+    """Targets from the minimum-volatility portfolio up to (just short of) the best reachable return"""
+    ef = _new_frontier(mu, cov, weight_bounds, l2_gamma, solver)
+    ef.min_volatility()
+    w_min = ef.weights
+    lo_ret, lo_vol = float(w_min @ mu.values), float(np.sqrt(w_min @ cov.values @ w_min))
+    best = int(np.argmax(mu.values))
+    hi_ret, hi_vol = float(mu.values[best]), float(np.sqrt(cov.values[best, best]))
+    if sweep == "return":
+        return np.linspace(lo_ret, lo_ret + (hi_ret - lo_ret) * 0.999, n_points)
+    return np.linspace(lo_vol * 1.001, hi_vol, n_points)
+
+
+def efficient_frontier(mu, cov, n_points=100, sweep="return", n_workers=1, weight_bounds=(0, 1),
+                       l2_gamma=0, risk_free_rate=0.02, solver=FRONTIER_SOLVER):
+    """
+    Sweep the efficient frontier over `n_points` target returns (sweep="return") or target
+    volatilities (sweep="risk"). n_workers > 1 splits the grid into contiguous slices solved
+    in a process pool (None = one per core).
+    Returns (points, weights): points has return/volatility/sharpe per target, weights is
+    a DataFrame of allocations (one row per point, one column per asset).
+    """
+    mu = pd.Series(mu)
+    cov = pd.DataFrame(cov).loc[mu.index, mu.index]
+    targets = _target_grid(mu, cov, n_points, sweep, weight_bounds, l2_gamma, solver)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    slices = [s for s in np.array_split(targets, min(n_workers, n_points)) if len(s)]
+    args = (sweep, weight_bounds, l2_gamma, solver)
+    if len(slices) > 1:
+        with ProcessPoolExecutor(max_workers=len(slices)) as pool:
+            parts = list(pool.map(_sweep_slice, [mu] * len(slices), [cov] * len(slices), slices,
+                                  *[[a] * len(slices) for a in args]))
+    else:
+        parts = [_sweep_slice(mu, cov, targets, *args)]
+
+    weights = pd.DataFrame(np.vstack(parts), columns=mu.index)
+    returns = weights.values @ mu.values
+    vols = np.sqrt(np.einsum('ij,jk,ik->i', weights.values, cov.values, weights.values))
+    points = pd.DataFrame({"target": targets, "return": returns, "volatility": vols,
+                           "sharpe": (returns - risk_free_rate) / vols})
+    return points, weights
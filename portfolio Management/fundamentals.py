@@ -0,0 +1,203 @@
+"""
+Cached company metadata: market caps for the optimizers, info and analyst recommendations
+for the Analysis tab. Values are fetched through the rate limiter and kept on disk next to
+the price store, each with its fetch time so callers decide how stale is acceptable
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+import pandas as pd
+from price_store import DEFAULT_STORE_PATH
+from rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class FieldCache:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fields ("
+                "ticker TEXT NOT NULL, field TEXT NOT NULL, value TEXT, fetched_at REAL NOT NULL, "
+                "PRIMARY KEY (ticker, field)) WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, tickers, field, max_age):
+        """{ticker: value} for entries of `field` fetched less than `max_age` ago"""
+        cutoff = time.time() - max_age.total_seconds()
+        tickers = list(tickers)
+        found = {}
+        with self._connect() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(tickers), 500):
+                chunk = tickers[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT ticker, value FROM fields WHERE field = ? AND fetched_at >= ? "
+                    f"AND ticker IN ({','.join('?' * len(chunk))})",
+                    [field, cutoff, *chunk],
+                ).fetchall()
+                found.update((t, json.loads(v)) for t, v in rows)
+        return found
+
+    def put(self, ticker, values):
+        """Store {field: JSON-serializable value} for a ticker, stamped with the current time"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fields VALUES (?, ?, ?, ?)",
+                [(ticker, field, json.dumps(value), now) for field, value in values.items()],
+            )
+
+
+class MarketCapProvider:
+    def __init__(self, limiter, cache, max_age=timedelta(days=1), max_workers=4):
+        self.limiter = limiter
+        self.cache = cache
+        self.max_age = max_age  # Market caps barely move intraday
+        self.max_workers = max_workers
+
+    def _fetch(self, ticker):
+        mcap = self.limiter.ticker_attribute(ticker, "fast_info", key="marketCap")
+        if not mcap:
+            # fast_info has no market cap for some listings; fall back to the heavy .info call
+            info = self.limiter.ticker_attribute(ticker, "info") or {}
+            mcap = info.get("marketCap")
+        return mcap
+
+    def get_many(self, tickers):
+        """{ticker: market cap}; 0 where Yahoo has none. Only stale or unknown tickers hit the network"""
+        mcaps = self.cache.get(tickers, "marketCap", self.max_age)
+        stale = [t for t in tickers if t not in mcaps]
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for ticker, mcap in zip(stale, pool.map(self._fetch, stale)):
+                    if mcap:
+                        self.cache.put(ticker, {"marketCap": float(mcap)})
+                        mcaps[ticker] = float(mcap)
+        return {t: mcaps.get(t, 0) for t in tickers}
+
+
+# How long each fundamentals field is served from disk before it is refetched
+FUNDAMENTAL_FIELDS = {
+    "info": timedelta(days=1),
+    "recommendations": timedelta(days=7),  # Analyst tables change monthly at most
+}
+
+
+def _encode(field, value):
+    """JSON-safe form of a yfinance attribute"""
+    if field == "recommendations":
+        if value is None or getattr(value, "empty", True):
+            return None
+        return json.loads(value.to_json(orient="split", date_format="iso"))
+    # info mixes numbers, strings and the odd timestamp
+    return json.loads(json.dumps(value or {}, default=str))
+
+
+def _decode(field, value):
+    if field == "recommendations":
+        if not value:
+            return None
+        return pd.DataFrame(value["data"], index=value["index"], columns=value["columns"])
+    return value or {}
+
+
+class FundamentalsStore:
+    def __init__(self, limiter, cache, fields=FUNDAMENTAL_FIELDS, failure_ttl=timedelta(minutes=15), idle_wait=1.0):
+        self.limiter = limiter
+        self.cache = cache
+        self.fields = fields
+        self.failure_ttl = failure_ttl  # A failed fetch is not retried before this
+        self.idle_wait = idle_wait  # Seconds between checks for a quiet rate limiter
+        self.lock = threading.Lock()
+        self.queue = []  # Tickers waiting for a background prefetch
+        self.due = {}  # ticker -> time its next prefetch may run
+        self.running = False
+
+    def _refresh(self, ticker):
+        """Fetch the fields of `ticker` that are missing or stale on disk; True if none failed"""
+        ok = True
+        for field, max_age in self.fields.items():
+            if ticker in self.cache.get([ticker], field, max_age):
+                continue
+            fetched = self.limiter.ticker_attribute(ticker, field)
+            if fetched is None:
+                # Failed (not merely empty): nothing is cached, the ticker is retried after failure_ttl
+                ok = False
+                continue
+            self.cache.put(ticker, {field: _encode(field, fetched)})
+        return ok
+
+    def get(self, ticker):
+        """
+        {"info": dict, "recommendations": DataFrame or None} from disk only, whatever their age;
+        info is None while nothing is stored yet. Never touches the network: a missing or stale
+        ticker is queued for the background prefetch, ahead of the others.
+        """
+        values, stale = {}, False
+        for field, max_age in self.fields.items():
+            fresh = self.cache.get([ticker], field, max_age)
+            stale = stale or ticker not in fresh
+            values[field] = fresh[ticker] if ticker in fresh else self.cache.get([ticker], field, timedelta.max).get(ticker)
+        if stale:
+            self.prefetch([ticker], first=True)
+        decoded = {field: _decode(field, value) for field, value in values.items()}
+        if values.get("info") is None:
+            decoded["info"] = None
+        return decoded
+
+    def prefetch(self, tickers, first=False):
+        """
+        Fill the store for `tickers` on a background thread, one rate-limited call at a time and
+        only while price downloads leave the limiter idle
+        """
+        now = time.time()
+        with self.lock:
+            new = [t for t in tickers if t not in self.queue and self.due.get(t, 0) <= now]
+            self.queue = new + self.queue if first else self.queue + new
+            if not self.queue or self.running:
+                return
+            self.running = True
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        horizon = min(self.fields.values()).total_seconds()
+        while True:
+            # Price loading comes first: only take a token nobody else is waiting for
+            while not self.limiter.idle():
+                time.sleep(self.idle_wait)
+            with self.lock:
+                if not self.queue:
+                    self.running = False
+                    return
+                ticker = self.queue.pop(0)
+            try:
+                ok = self._refresh(ticker)
+            except Exception as e:
+                logger.info(f"Prefetching fundamentals for {ticker} failed: {e}")
+                ok = False
+            with self.lock:
+                self.due[ticker] = time.time() + (horizon if ok else self.failure_ttl.total_seconds())
+
+
+field_cache = FieldCache()
+market_cap_provider = MarketCapProvider(rate_limiter, field_cache)
+fundamentals_store = FundamentalsStore(rate_limiter, field_cache)
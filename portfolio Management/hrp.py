@@ -0,0 +1,180 @@
+"""
+Hierarchical Risk Parity for large universes
+Same allocation as pypfopt's HRPOpt, but the linkage tree is cached by correlation matrix
+(and, for single linkage, grown incrementally when tickers are added), single linkage is
+built from a minimum spanning tree, and the recursive bisection works on whole levels of
+the tree with NumPy instead of per-cluster pandas lookups
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import scipy.cluster.hierarchy as sch
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+
+def correlation_distance(corr):
+    """HRP distance sqrt((1 - rho) / 2), as in HRPOpt"""
+    return np.sqrt(np.clip((1.0 - np.asarray(corr, dtype=np.float64)) / 2.0, 0.0, 1.0))
+
+
+def _mst_edges(rows, cols, weights, n):
+    """(rows, cols, weights) of the minimum spanning tree of a sparse graph on n nodes"""
+    # csgraph treats stored zeros as missing edges; identical assets are at distance 0
+    graph = coo_matrix((np.maximum(weights, 1e-300), (rows, cols)), shape=(n, n)).tocsr()
+    tree = minimum_spanning_tree(graph).tocoo()
+    return tree.row, tree.col, np.where(tree.data <= 1e-300, 0.0, tree.data)
+
+
+def mst_linkage(rows, cols, weights, n):
+    """Single-linkage matrix (scipy format) from MST edges: merge along edges by increasing weight"""
+    parent = np.arange(2 * n - 1)
+    size = np.ones(2 * n - 1)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    link = np.zeros((n - 1, 4))
+    for step, e in enumerate(np.argsort(weights, kind="stable")):
+        a, b = find(rows[e]), find(cols[e])
+        a, b = min(a, b), max(a, b)
+        new = n + step
+        parent[a] = parent[b] = new
+        size[new] = size[a] + size[b]
+        link[step] = (a, b, weights[e], size[new])
+    return link
+
+
+def bisection_weights(cov, order):
+    """
+    HRP recursive bisection over the quasi-diagonal `order`, one tree level at a time.
+    Each level's cluster variances come from a single block-diagonal product.
+    """
+    cov = np.asarray(cov, dtype=np.float64)[np.ix_(order, order)]
+    n = len(order)
+    inv_var = 1.0 / np.diag(cov)
+    w = np.ones(n)
+    segments = [(0, n)]
+    while segments:
+        # Split every cluster with more than one asset in half (as HRPOpt does)
+        halves = [(a, b) for start, end in segments if end - start > 1
+                  for a, b in ((start, start + (end - start) // 2), (start + (end - start) // 2, end))]
+        if not halves:
+            break
+        seg_id = np.full(n, -1)
+        for i, (a, b) in enumerate(halves):
+            seg_id[a:b] = i
+        inside = seg_id >= 0
+        # Inverse-variance portfolio within each half, then its variance
+        ivp = np.where(inside, inv_var, 0.0)
+        sums = np.bincount(seg_id[inside], weights=ivp[inside], minlength=len(halves))
+        ivp[inside] /= sums[seg_id[inside]]
+        same = (seg_id[:, None] == seg_id[None, :]) & inside[:, None]
+        quad = ivp * ((cov * same) @ ivp)
+        var = np.bincount(seg_id[inside], weights=quad[inside], minlength=len(halves))
+
+        alpha = 1 - var[0::2] / (var[0::2] + var[1::2])
+        for (a, b), (c, d), al in zip(halves[0::2], halves[1::2], alpha):
+            w[a:b] *= al
+            w[c:d] *= 1 - al
+        segments = halves
+    weights = np.empty(n)
+    weights[order] = w
+    return weights
+
+
+def _fingerprint(corr):
+    digest = hashlib.sha1(repr(list(corr.columns)).encode())
+    digest.update(np.ascontiguousarray(corr.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class HRPEngine:
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.trees = OrderedDict()  # (corr fingerprint, method) -> entry dict
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+
+    def _find_base(self, corr):
+        """A cached single-linkage tree over a subset of these tickers with unchanged correlations"""
+        labels = list(corr.columns)
+        with self.lock:
+            candidates = [e for (_, method), e in self.trees.items() if method == "single"]
+        for entry in reversed(candidates):
+            old = entry["labels"]
+            if len(old) < 2 or not set(old) <= set(labels):
+                continue
+            # Same history gives the same correlations up to float summation order
+            if np.allclose(corr.loc[old, old].values, entry["corr"], rtol=0, atol=1e-12):
+                return entry
+        return None
+
+    def linkage(self, corr, method="single"):
+        """(linkage matrix, quasi-diagonal order) for a correlation DataFrame; cached"""
+        key = (_fingerprint(corr), method)
+        with self.lock:
+            if key in self.trees:
+                self.trees.move_to_end(key)
+                self.hits += 1
+                entry = self.trees[key]
+                return entry["link"], entry["order"]
+            self.misses += 1
+
+        labels = list(corr.columns)
+        n = len(labels)
+        dist = correlation_distance(corr.values)
+        entry = {"labels": labels, "corr": corr.values.copy()}
+        if method == "single":
+            base = self._find_base(corr)
+            if base is not None:
+                # New MST lies within the old tree's edges plus every edge touching a new ticker
+                pos = {t: i for i, t in enumerate(labels)}
+                remap = np.array([pos[t] for t in base["labels"]])
+                is_new = np.ones(n, dtype=bool)
+                is_new[remap] = False
+                news, others = np.nonzero(is_new[:, None] & (~is_new[None, :] | np.triu(np.ones((n, n), bool), k=1)))
+                rows = np.r_[remap[base["rows"]], news]
+                cols = np.r_[remap[base["cols"]], others]
+                weights = np.r_[base["weights"], dist[news, others]]
+                with self.lock:
+                    self.incremental += 1
+            else:
+                rows, cols = np.triu_indices(n, k=1)
+                weights = dist[rows, cols]
+            rows, cols, weights = _mst_edges(rows, cols, weights, n)
+            entry.update(rows=rows, cols=cols, weights=weights)
+            link = mst_linkage(rows, cols, weights, n)
+        else:
+            link = sch.linkage(dist[np.triu_indices(n, k=1)], method)
+        entry.update(link=link, order=sch.leaves_list(link))
+
+        with self.lock:
+            self.trees[key] = entry
+            while len(self.trees) > self.maxsize:
+                self.trees.popitem(last=False)
+        return entry["link"], entry["order"]
+
+    def weights(self, cov, method="single"):
+        """HRP weights (Series sorted by ticker, like HRPOpt) for a covariance DataFrame"""
+        if len(cov.columns) < 2:
+            return pd.Series(1.0, index=cov.columns)
+        sd = np.sqrt(np.diag(cov.values))
+        # Rounded like HRPOpt(cov_matrix=...): tiny float noise should not reshape the tree
+        corr = pd.DataFrame(cov.values / np.outer(sd, sd), index=cov.index, columns=cov.columns).round(6)
+        _, order = self.linkage(corr, method)
+        return pd.Series(bisection_weights(cov.values, order), index=cov.columns).sort_index()
+
+    def clear(self):
+        with self.lock:
+            self.trees.clear()
+
+
+hrp_engine = HRPEngine()
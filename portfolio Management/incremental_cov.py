@@ -0,0 +1,88 @@
+"""
+Incremental mean/covariance of daily returns
+Each new bar costs O(N^2) instead of re-scanning the whole O(T*N^2) history:
+expanding (Welford), fixed rolling window (Welford add + remove), or EWMA
+"""
+from collections import deque
+import numpy as np
+
+
+class IncrementalCovariance:
+    def __init__(self, n_assets, window=None, halflife=None):
+        if window is not None and halflife is not None:
+            raise ValueError("Use either a rolling window or an EWMA halflife, not both")
+        if window is not None and window < 2:
+            raise ValueError("Rolling window needs at least 2 observations")
+        self.n_assets = n_assets
+        self.window = window
+        self.halflife = halflife
+        # EWMA weight of the newest observation
+        self.alpha = 1 - np.exp(np.log(0.5) / halflife) if halflife else None
+        self.rows = deque() if window else None
+        self.n = 0
+        self.mean_ = np.zeros(n_assets)
+        self.m2 = np.zeros((n_assets, n_assets))  # Sum of co-deviations (Welford); EWMA: the covariance
+        self._removals = 0
+
+    def _add(self, x):
+        self.n += 1
+        delta = x - self.mean_
+        self.mean_ += delta / self.n
+        self.m2 += np.outer(delta, x - self.mean_)
+
+    def _remove(self, x):
+        self.n -= 1
+        delta = x - self.mean_
+        self.mean_ -= delta / self.n
+        self.m2 -= np.outer(delta, x - self.mean_)
+
+    def _rebuild(self):
+        """Recompute the window from scratch to shed round-off from repeated removals"""
+        data = np.asarray(self.rows)
+        self.mean_ = data.mean(axis=0)
+        centered = data - self.mean_
+        self.m2 = centered.T @ centered
+        self._removals = 0
+
+    def update(self, x):
+        """Fold in one return vector; rows containing NaN are skipped"""
+        x = np.asarray(x, dtype=np.float64)
+        if np.isnan(x).any():
+            return self
+        if self.alpha is not None:
+            if self.n == 0:
+                self.mean_ = x.copy()
+            else:
+                delta = x - self.mean_
+                self.mean_ += self.alpha * delta
+                self.m2 = (1 - self.alpha) * (self.m2 + self.alpha * np.outer(delta, delta))
+            self.n += 1
+            return self
+
+        self._add(x)
+        if self.rows is not None:
+            self.rows.append(x)
+            if len(self.rows) > self.window:
+                self._remove(self.rows.popleft())
+                self._removals += 1
+                if self._removals >= self.window:
+                    self._rebuild()
+        return self
+
+    def update_many(self, rows):
+        for x in np.asarray(rows, dtype=np.float64):
+            self.update(x)
+        return self
+
+    @property
+    def mean(self):
+        return self.mean_.copy()
+
+    @property
+    def cov(self):
+        """Sample covariance (ddof=1) for expanding/rolling, exponentially weighted for EWMA"""
+        if self.alpha is not None:
+            return self.m2.copy()
+        if self.n < 2:
+            return np.full((self.n_assets, self.n_assets), np.nan)
+        return self.m2 / (self.n - 1)
@@ -0,0 +1,128 @@
+"""
+Technical indicators for a whole price panel at once
+Each indicator runs as one 2-D rolling/EWM pass over every column (same definitions as
+the `ta` package), and results are cached per ticker and parameter set so reruns and
+checkbox toggles only compute tickers whose prices changed
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def _ema(data, span):
+    return data.ewm(span=span, min_periods=span, adjust=False).mean()
+
+
+def _rsi(prices, window):
+    diff = prices.diff()
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    rsi = 100 - 100 / (1 + ema_up / ema_down)
+    return {"rsi": rsi.mask(ema_down == 0, 100.0)}
+
+
+def _bollinger(prices, window, window_dev):
+    rolling = prices.rolling(window, min_periods=window)
+    mavg = rolling.mean()
+    mstd = rolling.std(ddof=0)
+    return {"mavg": mavg, "upper": mavg + window_dev * mstd, "lower": mavg - window_dev * mstd}
+
+
+def _macd(prices, window_slow, window_fast, window_sign):
+    line = _ema(prices, window_fast) - _ema(prices, window_slow)
+    signal = _ema(line, window_sign)
+    return {"macd": line, "signal": signal, "hist": line - signal}
+
+
+# name -> (prices, **params) -> {output: DataFrame}
+_BUILDERS = {
+    "sma": lambda p, window: {"sma": p.rolling(window, min_periods=window).mean()},
+    "ema": lambda p, window: {"ema": _ema(p, window)},
+    "rsi": _rsi,
+    "bollinger": _bollinger,
+    "macd": _macd,
+}
+
+
+def column_fingerprints(prices):
+    """{column: content hash of that column and the shared index}"""
+    index_bytes = pd.util.hash_pandas_object(prices.index, index=False).values.tobytes()
+    values = prices.to_numpy(dtype=np.float64)
+    fingerprints = {}
+    for i, col in enumerate(prices.columns):
+        digest = hashlib.sha1(index_bytes)
+        digest.update(np.ascontiguousarray(values[:, i]).tobytes())
+        fingerprints[col] = digest.hexdigest()
+    return fingerprints
+
+
+class IndicatorCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize  # Number of (ticker, indicator, params) entries
+        self.entries = OrderedDict()  # (column hash, name, params) -> {output: Series}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compute(self, prices, name, **params):
+        """{output: DataFrame over prices.columns}; only uncached columns are recomputed"""
+        prices = prices.to_frame() if isinstance(prices, pd.Series) else prices
+        param_key = tuple(sorted(params.items()))
+        keys = {col: (fp, name, param_key) for col, fp in column_fingerprints(prices).items()}
+
+        found = {}
+        with self.lock:
+            for col, key in keys.items():
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    found[col] = entry
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        missing = [col for col in prices.columns if col not in found]
+        if missing:
+            outputs = _BUILDERS[name](prices[missing], **params)
+            with self.lock:
+                for col in missing:
+                    found[col] = {out: frame[col] for out, frame in outputs.items()}
+                    self.entries[keys[col]] = found[col]
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+
+        if not found:
+            return _BUILDERS[name](prices, **params)
+        outputs = next(iter(found.values())).keys()
+        return {out: pd.DataFrame({col: found[col][out] for col in prices.columns}, index=prices.index)
+                for out in outputs}
+
+    # Results are shared between callers: treat them as read-only
+
+    def sma(self, prices, window=20):
+        return self.compute(prices, "sma", window=window)["sma"]
+
+    def ema(self, prices, window=20):
+        return self.compute(prices, "ema", window=window)["ema"]
+
+    def rsi(self, prices, window=14):
+        return self.compute(prices, "rsi", window=window)["rsi"]
+
+    def bollinger(self, prices, window=20, window_dev=2):
+        """{"mavg", "upper", "lower"} bands"""
+        return self.compute(prices, "bollinger", window=window, window_dev=window_dev)
+
+    def macd(self, prices, window_slow=26, window_fast=12, window_sign=9):
+        """{"macd", "signal", "hist"} lines"""
+        return self.compute(prices, "macd", window_slow=window_slow, window_fast=window_fast,
+                            window_sign=window_sign)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,61 @@
+"""
+On-disk registry of trained forecasting models
+Models are keyed by ticker and hyperparameters and saved with their training metadata
+(scaler range, last bar seen), so later forecasts warm-start instead of training from scratch
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+DEFAULT_MODEL_PATH = os.environ.get(
+    "MODEL_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "models"),
+)
+
+
+def model_key(ticker, **hparams):
+    """File-safe key: readable ticker prefix plus a hash of the hyperparameters"""
+    digest = hashlib.sha1(json.dumps({"ticker": ticker, **hparams}, sort_keys=True).encode()).hexdigest()
+    return f"{re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)}-{digest[:12]}"
+
+
+class ModelRegistry:
+    def __init__(self, path=DEFAULT_MODEL_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.loaded = {}  # key -> (model, meta); skips reloading from disk on every click
+        self.lock = threading.Lock()
+
+    def _files(self, key):
+        base = os.path.join(self.path, key)
+        return base + ".keras", base + ".json"
+
+    def load(self, key):
+        """(model, meta) for a key, or None if it was never trained"""
+        with self.lock:
+            if key in self.loaded:
+                return self.loaded[key]
+        model_file, meta_file = self._files(key)
+        if not (os.path.exists(model_file) and os.path.exists(meta_file)):
+            return None
+        from tensorflow.keras.models import load_model
+        with open(meta_file) as f:
+            meta = json.load(f)
+        entry = (load_model(model_file), meta)
+        with self.lock:
+            self.loaded[key] = entry
+        return entry
+
+    def save(self, key, model, meta):
+        model_file, meta_file = self._files(key)
+        model.save(model_file)
+        # Metadata last: a model file without metadata is ignored by load()
+        with open(meta_file, "w") as f:
+            json.dump(meta, f)
+        with self.lock:
+            self.loaded[key] = (model, meta)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,172 @@
+"""
+Persistent on-disk price store for Yahoo Finance daily bars (OHLCV)
+SQLite table keyed by (ticker, date) plus the date ranges already fetched per ticker,
+so restarts and other app instances on the same host only download what is missing
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "PRICE_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices.db"),
+)
+
+# Columns of a daily bar, as named by yfinance
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Empty answers for longer gaps than this are treated as a failed fetch, not as "no trading days"
+MAX_EMPTY_GAP = timedelta(days=7)
+
+
+def to_day(value):
+    """Normalize a date/datetime/str to a tz-naive midnight Timestamp"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def date_gaps(covered, start, end):
+    """
+    Sub-ranges of [start, end) not covered by any (start, end) pair in `covered`.
+    All ranges are end-exclusive, like yfinance's start/end arguments.
+    """
+    start, end = to_day(start), to_day(end)
+    gaps = []
+    cursor = start
+    for c_start, c_end in sorted((to_day(a), to_day(b)) for a, b in covered):
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges):
+    merged = []
+    for r_start, r_end in sorted(ranges):
+        if merged and r_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], r_end))
+        else:
+            merged.append((r_start, r_end))
+    return merged
+
+
+class PriceStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets several app instances read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "ticker TEXT NOT NULL, date TEXT NOT NULL, close REAL, "
+                "open REAL, high REAL, low REAL, volume REAL, "
+                "PRIMARY KEY (ticker, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(prices)")}
+            if "open" not in columns:
+                # Stores from before OHLCV only hold closes: add the columns and refetch everything once
+                for field in ("open", "high", "low", "volume"):
+                    conn.execute(f"ALTER TABLE prices ADD COLUMN {field} REAL")
+                conn.execute("DELETE FROM coverage")
+            conn.execute("CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _coverage(conn, ticker):
+        rows = conn.execute("SELECT start, end FROM coverage WHERE ticker = ?", (ticker,)).fetchall()
+        return [(to_day(a), to_day(b)) for a, b in rows]
+
+    def coverage(self, ticker):
+        """Fetched (start, end) ranges for a ticker, end-exclusive"""
+        with self._connect() as conn:
+            return self._coverage(conn, ticker)
+
+    def missing_ranges(self, ticker, start, end):
+        """Date ranges inside [start, end) that still have to be downloaded"""
+        # Today's bar is still forming, so never treat it as stored
+        end = min(to_day(end), to_day(pd.Timestamp.now()))
+        if to_day(start) >= end:
+            return []
+        return date_gaps(self.coverage(ticker), start, end)
+
+    def write(self, ticker, bars, start, end):
+        """
+        Save bars fetched for [start, end) and record that range as covered.
+        `bars` is a DataFrame with BAR_FIELDS columns, or a Series of closes only.
+        """
+        start = to_day(start)
+        end = min(to_day(end), to_day(pd.Timestamp.now()))
+        if bars is None:
+            bars = pd.DataFrame(columns=BAR_FIELDS)
+        elif isinstance(bars, pd.Series):
+            bars = bars.to_frame("Close")
+        bars = bars.reindex(columns=BAR_FIELDS).dropna(subset=["Close"])
+        if bars.empty and end - start > MAX_EMPTY_GAP:
+            return
+        rows = [
+            (ticker, to_day(d).strftime("%Y-%m-%d"),
+             *(None if pd.isna(v) else float(v) for v in (close, open_, high, low, volume)))
+            for d, open_, high, low, close, volume in bars.itertuples()
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, date, close, open, high, low, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if start < end:
+                ranges = merge_ranges(self._coverage(conn, ticker) + [(start, end)])
+                conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+                conn.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?)",
+                    [(ticker, a.strftime("%Y-%m-%d"), b.strftime("%Y-%m-%d")) for a, b in ranges],
+                )
+
+    def read(self, ticker, start, end):
+        """Stored closes for [start, end) as a Series with a tz-naive DatetimeIndex"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, close FROM prices WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date",
+                (ticker, to_day(start).strftime("%Y-%m-%d"), to_day(end).strftime("%Y-%m-%d")),
+            ).fetchall()
+        if not rows:
+            return pd.Series(dtype=float, name="Close")
+        dates, closes = zip(*rows)
+        return pd.Series(closes, index=pd.DatetimeIndex(dates, name="Date"), name="Close")
+
+    def read_bars(self, ticker, start, end):
+        """Stored OHLCV bars for [start, end) as a DataFrame with BAR_FIELDS columns"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM prices "
+                "WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date",
+                (ticker, to_day(start).strftime("%Y-%m-%d"), to_day(end).strftime("%Y-%m-%d")),
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=BAR_FIELDS, dtype=float)
+        bars = pd.DataFrame([r[1:] for r in rows], columns=BAR_FIELDS, dtype=float)
+        bars.index = pd.DatetimeIndex([r[0] for r in rows], name="Date")
+        return bars
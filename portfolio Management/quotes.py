@@ -0,0 +1,68 @@
+"""
+Latest-price snapshots for dashboard widgets (ECO indicators and similar)
+All requested tickers are fetched in one batched, rate-limited download and kept in a
+process-wide cache for a short TTL, so every session and rerun within it shares one fetch
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+from rate_limiter import rate_limiter
+
+
+class QuoteService:
+    def __init__(self, limiter, ttl=60, lookback_days=7):
+        self.limiter = limiter
+        self.ttl = ttl  # Seconds a quote is served without refetching
+        self.lookback_days = lookback_days  # Enough calendar days to span a long weekend
+        self.quotes = {}  # ticker -> (fetched_at, quote dict or None if Yahoo had no data)
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()
+
+    def _stale(self, tickers):
+        now = time.monotonic()
+        with self.lock:
+            return [t for t in tickers if t not in self.quotes or now - self.quotes[t][0] >= self.ttl]
+
+    @staticmethod
+    def _closes(data, tickers):
+        """Close panel (one column per ticker) from a group_by='ticker' download"""
+        if data is None or data.empty:
+            return pd.DataFrame(columns=tickers)
+        if isinstance(data.columns, pd.MultiIndex):
+            return data.xs("Close", axis=1, level=1).reindex(columns=tickers)
+        return pd.DataFrame({tickers[0]: data["Close"]})
+
+    def _fetch(self, tickers):
+        end = datetime.now() + timedelta(days=1)
+        data = self.limiter.download_with_retry(tickers, end - timedelta(days=self.lookback_days), end)
+        closes = self._closes(data, tickers)
+        fetched_at = time.monotonic()
+        quotes = {}
+        for ticker in tickers:
+            series = closes[ticker].dropna() if ticker in closes else pd.Series(dtype=float)
+            quote = None
+            if len(series):
+                last = float(series.iloc[-1])
+                prev = float(series.iloc[-2]) if len(series) > 1 else last
+                quote = {"price": last, "previous": prev,
+                         "change_pct": (last - prev) / prev * 100 if prev else 0.0,
+                         "as_of": str(series.index[-1].date())}
+            quotes[ticker] = (fetched_at, quote)
+        with self.lock:
+            self.quotes.update(quotes)
+
+    def get(self, tickers):
+        """{ticker: quote or None}; stale or unknown tickers are refreshed together in one request"""
+        tickers = list(dict.fromkeys(tickers))
+        if self._stale(tickers):
+            # One fetch at a time: sessions arriving together wait for it instead of repeating it
+            with self.fetch_lock:
+                stale = self._stale(tickers)
+                if stale:
+                    self._fetch(stale)
+        with self.lock:
+            return {t: self.quotes[t][1] for t in tickers}
+
+
+quote_service = QuoteService(rate_limiter)
@@ -2,73 +2,166 @@
 Rate Limiter for Yahoo Finance API calls
 Implements auto-throttling and session management
 """
+import random
 import time
+import threading
+import asyncio
 import yfinance as yf
 from datetime import datetime, timedelta
 from functools import wraps
+import logging
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
+from price_store import PriceStore, BAR_FIELDS, MAX_EMPTY_GAP, to_day
+
+logger = logging.getLogger(__name__)
+
+def notify(kind, message):
+    """Show a status message on the page, or log it when called from a background thread"""
+    if get_script_run_ctx() is None:
+        logger.info(message)
+    else:
+        getattr(st, kind)(message)
+
+def is_rate_limit_error(error):
+    error_msg = f"{type(error).__name__} {error}".lower()
+    return 'rate' in error_msg or 'limit' in error_msg or '429' in error_msg or 'too many' in error_msg
+
+def backoff_delay(attempt, base=15.0, cap=120.0):
+    """Exponential backoff with +/-50% jitter, so sessions limited together do not retry together"""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+class TokenBucket:
+    """Thread-safe token bucket: refills `rate` tokens per second up to `capacity`"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token, possibly on credit; returns the seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def idle(self):
+        """True when the bucket is full, i.e. nobody has drawn on it lately"""
+        with self.lock:
+            return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.capacity
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
 
 class YFinanceRateLimiter:
-    def __init__(self, calls_per_minute=15, min_delay=2.0):
+    def __init__(self, calls_per_minute=15, burst=3, store=None):
         self.calls_per_minute = calls_per_minute
-        self.min_delay = min_delay  # Minimum delay between calls
-        self.call_times = []
-        self.last_call = 0
+        self.burst = burst  # Calls allowed back-to-back before the per-minute pacing kicks in
+        self.bucket = TokenBucket(calls_per_minute / 60.0, burst)
+        self.store = store  # Optional PriceStore checked before any network call
         
     def wait_if_needed(self):
-        """Ultra-conservative auto-throttle"""
-        now = time.time()
-        
-        # Enforce minimum delay between ANY calls
-        time_since_last = now - self.last_call
-        if time_since_last < self.min_delay:
-            wait = self.min_delay - time_since_last
+        """Block until the token bucket allows another call"""
+        wait = self.bucket.reserve()
+        if wait > 5:
+            notify("info", f"⏳ Rate limit protection: Waiting {wait:.1f}s...")
+        if wait > 0:
             time.sleep(wait)
-            now = time.time()
-        
-        # Remove calls older than 1 minute
-        self.call_times = [t for t in self.call_times if now - t < 60]
-        
-        # If we've made too many calls, wait
-        if len(self.call_times) >= self.calls_per_minute:
-            wait_time = 60 - (now - self.call_times[0]) + 5  # Add 5s buffer
-            if wait_time > 0:
-                st.info(f"⏳ Rate limit protection: Waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-                self.call_times = []
-        
-        # Add current call
-        self.call_times.append(time.time())
-        self.last_call = time.time()
     
-    def download_single_ticker(self, ticker, start, end, max_retries=3):
-        """Download a single ticker with retry logic"""
+    def idle(self):
+        """No call has drawn on the budget lately; low-priority work waits for this"""
+        return self.bucket.idle()
+
+    def download_single_ticker(self, ticker, start, end, max_retries=3, ohlcv=False):
+        """
+        Download a single ticker with retry logic, fetching only ranges missing from the store.
+        Returns closes, or the full OHLCV bars with ohlcv=True.
+        """
+        if self.store is None:
+            bars = self._fetch_bars(ticker, start, end, max_retries)
+            if bars is None or ohlcv:
+                return bars
+            return bars['Close']
+
+        for gap_start, gap_end in self.store.missing_ranges(ticker, start, end):
+            bars = self._fetch_bars(ticker, gap_start, gap_end, max_retries, allow_empty=True)
+            if bars is not None:
+                self.store.write(ticker, bars, gap_start, gap_end)
+
+        data = self._read_stored(ticker, start, end, ohlcv)
+        return data if not data.empty else None
+
+    def _fetch_bars(self, ticker, start, end, max_retries=3, allow_empty=False):
+        """Network fetch of OHLCV bars; allow_empty accepts an empty answer (e.g. a gap over a holiday)"""
         for attempt in range(max_retries):
             try:
                 self.wait_if_needed()
-                
-                # Use Ticker object for more reliable downloads
-                ticker_obj = yf.Ticker(ticker)
-                hist = ticker_obj.history(start=start, end=end, auto_adjust=True)
-                
-                if not hist.empty and 'Close' in hist.columns:
-                    return hist['Close']
+                bars = self._history_once(ticker, start, end)
+                if not bars.empty or allow_empty:
+                    return bars
                     
             except Exception as e:
-                error_msg = str(e).lower()
-                
-                if 'rate' in error_msg or 'limit' in error_msg or '429' in error_msg:
-                    wait_time = (2 ** attempt) * 15  # 15s, 30s, 60s
-                    st.warning(f"⚠️ Rate limit for {ticker}. Waiting {wait_time}s (attempt {attempt + 1}/{max_retries})...")
+                if is_rate_limit_error(e):
+                    wait_time = backoff_delay(attempt)  # ~15s, 30s, 60s
+                    notify("warning", f"⚠️ Rate limit for {ticker}. Waiting {wait_time:.0f}s (attempt {attempt + 1}/{max_retries})...")
                     time.sleep(wait_time)
                 else:
                     if attempt == max_retries - 1:
-                        st.warning(f"⚠️ Could not load {ticker}: {str(e)[:50]}")
+                        notify("warning", f"⚠️ Could not load {ticker}: {str(e)[:50]}")
                     time.sleep(2)
         
         return None
     
+    def _history_once(self, ticker, start, end):
+        """One unthrottled history request; returns the OHLCV bars (possibly empty)"""
+        # Use Ticker object for more reliable downloads
+        hist = yf.Ticker(ticker).history(start=start, end=end, auto_adjust=True)
+        if hist.empty or 'Close' not in hist.columns:
+            return pd.DataFrame(columns=BAR_FIELDS, dtype=float)
+        return hist.reindex(columns=BAR_FIELDS)
+
+    def _download_batch(self, tickers, start, end):
+        """One unthrottled multi-ticker request, grouped by ticker like yf.download"""
+        return yf.download(tickers, start=start, end=end, group_by='ticker', progress=False, threads=False, auto_adjust=True)
+
+    def ticker_attribute(self, ticker, attribute, key=None, max_retries=3):
+        """Throttled read of a yf.Ticker attribute such as 'info' or 'recommendations' (or one key of it)"""
+        for attempt in range(max_retries):
+            try:
+                self.wait_if_needed()
+                value = getattr(yf.Ticker(ticker), attribute)
+                # Lazy attributes like fast_info only hit the network on item access
+                return value[key] if key is not None else value
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    wait_time = backoff_delay(attempt)
+                    notify("warning", f"⚠️ Rate limit for {ticker}.{attribute}. Waiting {wait_time:.0f}s...")
+                    time.sleep(wait_time)
+                else:
+                    # Only rate limits are worth retrying; anything else will fail the same way again
+                    logger.info(f"Could not read {ticker}.{attribute}: {e}")
+                    return None
+        return None
+
+    def download_concurrent(self, tickers, start, end, max_in_flight=4, batch_size=5):
+        """Download many tickers in multi-ticker requests, several in flight under the same per-minute budget"""
+        from async_downloader import AsyncDownloader
+        return AsyncDownloader(self, max_in_flight=max_in_flight, batch_size=batch_size).download(tickers, start, end)
+    
     def download_with_retry(self, tickers, start, end, max_retries=3):
         """Standard yfinance download with retry logic for small lists/benchmarks"""
         if not isinstance(tickers, list):
@@ -89,52 +182,85 @@ class YFinanceRateLimiter:
                 if not data.empty:
                     return data
             except Exception as e:
-                if "rate" in str(e).lower() or "429" in str(e).lower():
-                    wait = (2 ** attempt) * 15
-                    st.warning(f"⚠️ Rate limited. Waiting {wait}s...")
+                if is_rate_limit_error(e):
+                    wait = backoff_delay(attempt)
+                    notify("warning", f"⚠️ Rate limited. Waiting {wait:.0f}s...")
                     time.sleep(wait)
         return None
 
-    def download_in_batches(self, tickers, start, end):
-        """Download tickers in SMALL batches for reliability"""
+    def download_in_batches(self, tickers, start, end, ohlcv=False):
+        """
+        Download tickers in SMALL batches for reliability.
+        Returns closes (one column per ticker), or with ohlcv=True the full bars with
+        (Price, Ticker) columns like yf.download, so data['Close'] is the close panel.
+        """
         all_data = {}
         batch_size = 5  # Increased slightly for better speed, but still safe
         
+        # Serve fully stored tickers locally and fetch only the union of missing ranges for the rest
+        requested = len(tickers)
+        fetch_start, fetch_end = start, end
+        if self.store is not None:
+            gaps = {t: self.store.missing_ranges(t, start, end) for t in tickers}
+            for t in tickers:
+                if not gaps[t]:
+                    stored = self._read_stored(t, start, end, ohlcv)
+                    if not stored.empty:
+                        all_data[t] = stored
+            tickers = [t for t in tickers if gaps[t]]
+            if tickers:
+                fetch_start = min(g[0][0] for t, g in gaps.items() if g)
+                fetch_end = max(g[-1][1] for t, g in gaps.items() if g)
+        cached = len(all_data)
+        
         # Split into batches
         batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # Progress widgets only exist when running in the page, not on a loader thread
+        show_progress = get_script_run_ctx() is not None
+        if show_progress:
+            progress_bar = st.progress(0)
+            status_text = st.empty()
         
         successful = 0
         failed = []
         
         for idx, batch in enumerate(batches):
-            status_text.text(f"📊 Loading batch {idx + 1}/{len(batches)}: {', '.join(batch[:3])}...")
+            if show_progress:
+                status_text.text(f"📊 Loading batch {idx + 1}/{len(batches)}: {', '.join(batch[:3])}...")
             
             # Try to download batch as a whole first (faster)
             data = None
             try:
                 self.wait_if_needed()
-                data = yf.download(batch, start=start, end=end, group_by='ticker', progress=False, threads=False, auto_adjust=True)
+                data = self._download_batch(batch, fetch_start, fetch_end)
             except:
                 pass
 
-            if data is not None and not data.empty:
+            if data is not None and data.empty and self.store is not None and to_day(fetch_end) - to_day(fetch_start) <= MAX_EMPTY_GAP:
+                # A short gap with no trading days (weekend, holiday): record it as covered instead
+                # of retrying every ticker on its own
+                for ticker in batch:
+                    self.store.write(ticker, None, fetch_start, fetch_end)
+                    stored = self._read_stored(ticker, start, end, ohlcv)
+                    if not stored.empty:
+                        all_data[ticker] = stored
+                        successful += 1
+            elif data is not None and not data.empty:
                 if isinstance(data.columns, pd.MultiIndex):
                     for ticker in batch:
                         try:
                             if ticker in data.columns.levels[0]:
-                                # Force clean numeric column
-                                col = data[ticker]['Close']
-                                if not col.empty:
-                                    all_data[ticker] = col
+                                # Keep the whole bar: candles and volume views read it from the same fetch
+                                bars = data[ticker].reindex(columns=BAR_FIELDS)
+                                if not bars['Close'].dropna().empty:
+                                    all_data[ticker] = self._merge_with_store(ticker, bars, fetch_start, fetch_end, start, end, ohlcv)
                                     successful += 1
                                 else:
                                     failed.append(ticker)
                         except:
                             # Fallback to individual download if batch extract fails
-                            ind_data = self.download_single_ticker(ticker, start, end)
+                            ind_data = self.download_single_ticker(ticker, start, end, ohlcv=ohlcv)
                             if ind_data is not None:
                                 all_data[ticker] = ind_data
                                 successful += 1
@@ -143,12 +269,13 @@ class YFinanceRateLimiter:
                 else:
                     # Single ticker batch
                     if 'Close' in data.columns:
-                        all_data[batch[0]] = data['Close']
+                        bars = data.reindex(columns=BAR_FIELDS)
+                        all_data[batch[0]] = self._merge_with_store(batch[0], bars, fetch_start, fetch_end, start, end, ohlcv)
                         successful += 1
             else:
                 # Batch failed, try individually
                 for ticker in batch:
-                    ind_data = self.download_single_ticker(ticker, start, end)
+                    ind_data = self.download_single_ticker(ticker, start, end, ohlcv=ohlcv)
                     if ind_data is not None:
                         all_data[ticker] = ind_data
                         successful += 1
@@ -156,19 +283,36 @@ class YFinanceRateLimiter:
                         failed.append(ticker)
             
             # Update progress
-            progress_bar.progress((idx + 1) / len(batches))
+            if show_progress:
+                progress_bar.progress((idx + 1) / len(batches))
         
-        progress_bar.empty()
-        status_text.empty()
+        if show_progress:
+            progress_bar.empty()
+            status_text.empty()
         
         # Show summary
-        if successful > 0:
-            st.success(f"✅ Successfully loaded {successful}/{len(tickers)} tickers")
+        if successful + cached > 0:
+            notify("success", f"✅ Successfully loaded {successful + cached}/{requested} tickers ({cached} from local store)")
         if failed:
             failed = list(set(failed))
-            st.warning(f"⚠️ Failed to load {len(failed)} tickers: {', '.join(failed[:5])}{'...' if len(failed) > 5 else ''}")
+            notify("warning", f"⚠️ Failed to load {len(failed)} tickers: {', '.join(failed[:5])}{'...' if len(failed) > 5 else ''}")
         
-        return pd.DataFrame(all_data)
+        if not ohlcv:
+            return pd.DataFrame(all_data)
+        if not all_data:
+            return pd.DataFrame()
+        panel = pd.concat(all_data, axis=1, names=['Ticker', 'Price'])
+        return panel.swaplevel(axis=1).sort_index(axis=1)
+
+    def _read_stored(self, ticker, start, end, ohlcv):
+        return self.store.read_bars(ticker, start, end) if ohlcv else self.store.read(ticker, start, end)
+
+    def _merge_with_store(self, ticker, bars, fetch_start, fetch_end, start, end, ohlcv=False):
+        """Persist bars fetched for [fetch_start, fetch_end) and return the full [start, end) history"""
+        if self.store is None:
+            return bars if ohlcv else bars['Close']
+        self.store.write(ticker, bars, fetch_start, fetch_end)
+        return self._read_stored(ticker, start, end, ohlcv)
 
 # Global rate limiter instance - Adjusted for better performance balance
-rate_limiter = YFinanceRateLimiter(calls_per_minute=20, min_delay=1.5)
+rate_limiter = YFinanceRateLimiter(calls_per_minute=20, burst=5, store=PriceStore())
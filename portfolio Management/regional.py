@@ -0,0 +1,127 @@
+"""
+Shared regional panels for the Global Markets explorer
+One process-wide panel per region, fetched once and refreshed on a schedule by a single
+background thread, with the normalized (base 100) series and correlation matrix computed
+at refresh time. Every session on the deployment reads the same precomputed results
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from price_store import to_day
+from rate_limiter import rate_limiter
+from risk_cache import risk_cache
+
+logger = logging.getLogger(__name__)
+
+REGION_TICKERS = {
+    "India (NIFTY 50)": ["^NSEI", "^BSESN", "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "ICICIBANK.NS", "INFY.NS", "HINDUNILVR.NS", "ITC.NS", "SBIN.NS", "BHARTIARTL.NS", "LICI.NS"],
+    "US (NYSE & NASDAQ)": ["^GSPC", "^IXIC", "^DJI", "AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "BRK-B", "JPM"],
+    "EU (London & Euronext)": ["^FTSE", "^FCHI", "^GDAXI", "SHEL.L", "AZN.L", "MC.PA", "ASML.AS", "SAP.DE", "OR.PA", "HSBA.L"],
+    "Japan (Tokyo)": ["^N225", "7203.T", "6758.T", "9984.T", "6861.T", "8306.T", "8035.T", "4502.T"],
+    "China (Shanghai & Shenzhen)": ["000001.SS", "399001.SZ", "600519.SS", "601398.SS", "601939.SS", "601857.SS", "601288.SS", "000858.SZ"],
+    "Hong Kong": ["^HSI", "0700.HK", "1299.HK", "9988.HK", "3690.HK", "0005.HK", "0939.HK", "2318.HK"]
+}
+
+
+def region_view(prices):
+    """Normalized (base 100) series and return correlations for a regional close panel"""
+    # First valid price per ticker, so a holiday on the first day does not blank a line
+    base = prices.bfill().iloc[0].replace(0, 1)
+    return {"prices": prices, "normalized": prices / base * 100, "corr": risk_cache.corr(prices)}
+
+
+class RegionalPanels:
+    def __init__(self, limiter, regions=REGION_TICKERS, refresh_interval=900, max_views=32):
+        self.limiter = limiter
+        self.regions = regions
+        self.refresh_interval = refresh_interval  # Seconds between background refreshes
+        self.max_views = max_views  # Sub-window views kept per region
+        self.panels = {}  # region -> {"start", "end", "updated_at", "views", ...region_view}
+        self.lock = threading.Lock()
+        self.region_locks = {region: threading.Lock() for region in regions}
+        self.run_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.stopped = False
+
+    def _target_end(self):
+        # End-exclusive, like yfinance: include today's bar
+        return to_day(pd.Timestamp.now()) + pd.Timedelta(days=1)
+
+    def refresh(self, region, start=None):
+        """Fetch the region (only store gaps hit the network) and recompute its derived views"""
+        with self.region_locks[region]:
+            with self.lock:
+                held = self.panels.get(region)
+            if start is not None and held is not None and held["start"] <= to_day(start):
+                return held  # Another session fetched it while we waited
+            start = held["start"] if start is None else to_day(start)
+            end = self._target_end()
+            # Multi-ticker requests (five symbols per token), several in flight
+            prices = self.limiter.download_concurrent(self.regions[region], start, end, batch_size=5)
+            entry = {"start": start, "end": end, "updated_at": time.time(), "views": OrderedDict(),
+                     **region_view(prices)}
+            with self.lock:
+                self.panels[region] = entry
+            return entry
+
+    def get(self, region, start, end):
+        """
+        Panel, normalized series and correlation for a region over [start, end).
+        The held window is served as precomputed; a narrower window is derived once and
+        then shared too. Only a region never seen (or an earlier start) fetches in this call.
+        """
+        start, end = to_day(start), to_day(end)
+        with self.lock:
+            entry = self.panels.get(region)
+        if entry is None or start < entry["start"]:
+            entry = self.refresh(region, start)
+        self.ensure_running()
+
+        prices = entry["prices"]
+        if prices.empty or (start <= entry["start"] and end >= entry["end"]):
+            return entry
+        key = (start, end)
+        with self.lock:
+            if key in entry["views"]:
+                entry["views"].move_to_end(key)
+                return entry["views"][key]
+        view = region_view(prices.loc[(prices.index >= start) & (prices.index < end)])
+        with self.lock:
+            entry["views"][key] = view
+            while len(entry["views"]) > self.max_views:
+                entry["views"].popitem(last=False)
+        return view
+
+    # ---- background refresh ----
+
+    def ensure_running(self):
+        with self.run_lock:
+            if not self.running and not self.stopped:
+                self.running = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+    def _run(self):
+        while not self.wake.wait(self.refresh_interval) and not self.stopped:
+            with self.lock:
+                regions = list(self.panels)
+            # Only regions someone has opened are kept fresh
+            for region in regions:
+                if self.stopped:
+                    break
+                try:
+                    self.refresh(region)
+                except Exception as e:
+                    # Keep serving the previous panel; retry next interval
+                    logger.info(f"Refreshing {region} failed: {e}")
+        with self.run_lock:
+            self.running = False
+
+
+regional_panels = RegionalPanels(rate_limiter)
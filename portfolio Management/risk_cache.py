@@ -0,0 +1,134 @@
+"""
+Memoized risk models shared by the optimizers and the correlation heatmaps
+Returns, covariance (sample and Ledoit-Wolf) and correlation are computed once per
+price panel, keyed by a fingerprint of its contents, with LRU eviction
+"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from pypfopt import risk_models
+from incremental_cov import IncrementalCovariance
+
+
+def panel_fingerprint(prices):
+    """Content hash of a price panel: values, index and column labels"""
+    labels = [prices.name] if isinstance(prices, pd.Series) else list(prices.columns)
+    digest = hashlib.sha1()
+    digest.update(repr(labels).encode())
+    digest.update(pd.util.hash_pandas_object(prices, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+# How each cached item is built: (cache, fingerprint, prices) -> result
+_BUILDERS = {
+    "returns": lambda c, k, p: p.pct_change(),
+    "clean_returns": lambda c, k, p: c._get(k, "returns", p).dropna(),
+    "mean_returns": lambda c, k, p: c._get(k, "clean_returns", p).mean(),
+    "sample_cov": lambda c, k, p: c._get(k, "clean_returns", p).cov(),
+    "shrunk_cov": lambda c, k, p: risk_models.CovarianceShrinkage(p).ledoit_wolf(),
+    "corr": lambda c, k, p: c._get(k, "returns", p).corr(),
+}
+
+
+class RiskModelCache:
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # fingerprint -> {name: result}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # (columns, window, halflife) -> accumulator state for streaming_cov
+        self.streams = OrderedDict()
+        self.stream_lock = threading.Lock()
+
+    def _get(self, key, name, prices):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if name in entry:
+                    self.hits += 1
+                    return entry[name]
+            self.misses += 1
+        result = _BUILDERS[name](self, key, prices)
+        with self.lock:
+            entry = self.entries.setdefault(key, {})
+            entry[name] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return result
+
+    # Results are shared between callers: treat them as read-only
+
+    def returns(self, prices):
+        """Daily simple returns, NaNs kept (pairwise statistics)"""
+        return self._get(panel_fingerprint(prices), "returns", prices)
+
+    def clean_returns(self, prices):
+        """Daily simple returns on dates where every asset has a price"""
+        return self._get(panel_fingerprint(prices), "clean_returns", prices)
+
+    def mean_returns(self, prices):
+        return self._get(panel_fingerprint(prices), "mean_returns", prices)
+
+    def sample_cov(self, prices):
+        """Daily sample covariance of clean returns"""
+        return self._get(panel_fingerprint(prices), "sample_cov", prices)
+
+    def shrunk_cov(self, prices):
+        """Annualized Ledoit-Wolf covariance, as used by Black-Litterman"""
+        return self._get(panel_fingerprint(prices), "shrunk_cov", prices)
+
+    def corr(self, prices):
+        """Pairwise correlation of daily returns"""
+        return self._get(panel_fingerprint(prices), "corr", prices)
+
+    def streaming_cov(self, prices, window=None, halflife=None):
+        """
+        Daily covariance over a rolling `window` of bars, an EWMA with `halflife` bars,
+        or expanding if neither is given. The accumulator is kept between calls, so a panel
+        that only gained bars (or whose newest bar was revised intraday) costs O(N^2) per new bar.
+        """
+        key = (tuple(prices.columns), window, halflife)
+        index = prices.index
+        with self.stream_lock:
+            state = self.streams.get(key)
+            acc = None
+            if state is not None:
+                acc, first_ts, committed_ts, committed_row = state
+                # Reuse only if history up to the committed bar is unchanged
+                reusable = (index[0] == first_ts and committed_ts in index
+                            and np.array_equal(prices.loc[committed_ts].values, committed_row, equal_nan=True))
+                if reusable:
+                    new_returns = prices.loc[committed_ts:].pct_change().iloc[1:].values
+                else:
+                    acc = None
+            if acc is None:
+                acc = IncrementalCovariance(len(prices.columns), window=window, halflife=halflife)
+                new_returns = prices.pct_change().values
+
+            # Everything but the newest bar is committed; the newest may still be revised intraday
+            if len(new_returns):
+                acc.update_many(new_returns[:-1])
+            if len(index) >= 2:
+                self.streams[key] = (acc, index[0], index[-2], prices.iloc[-2].values.copy())
+                self.streams.move_to_end(key)
+                while len(self.streams) > self.maxsize:
+                    self.streams.popitem(last=False)
+            latest = copy.deepcopy(acc)
+            if len(new_returns):
+                latest.update(new_returns[-1])
+        return pd.DataFrame(latest.cov, index=prices.columns, columns=prices.columns)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        with self.stream_lock:
+            self.streams.clear()
+
+
+risk_cache = RiskModelCache()
@@ -0,0 +1,90 @@
+"""
+FinBERT sentiment service
+The pipeline is loaded once per process (optionally warmed up on a background thread at
+startup), texts are scored in batches, and scores are cached by (ticker, text hash)
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+FINBERT_MODEL = "yiyanghkust/finbert-tone"
+
+
+class SentimentService:
+    def __init__(self, model=FINBERT_MODEL, batch_size=None, num_threads=None, maxsize=100000):
+        self.model = model
+        self.batch_size = batch_size or int(os.environ.get("SENTIMENT_BATCH_SIZE", 32))
+        # Torch intra-op threads; None keeps the library default
+        env_threads = os.environ.get("SENTIMENT_THREADS")
+        self.num_threads = num_threads or (int(env_threads) if env_threads else None)
+        self.maxsize = maxsize
+        self.scores = OrderedDict()  # (ticker, text hash) -> {"label", "score"}
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self._pipeline = None
+        self.warming = False
+
+    def load(self):
+        """The FinBERT pipeline, loaded on first use and shared by every caller"""
+        with self.load_lock:
+            if self._pipeline is None:
+                os.environ["TF_USE_LEGACY_KERAS"] = "1"
+                from transformers import pipeline
+                if self.num_threads:
+                    import torch
+                    torch.set_num_threads(self.num_threads)
+                self._pipeline = pipeline("sentiment-analysis", model=self.model)
+            return self._pipeline
+
+    def warm_up(self):
+        """Load the model on a background thread so the first click does not wait for it (once)"""
+        with self.lock:
+            if self.warming:
+                return
+            self.warming = True
+
+        def _load():
+            try:
+                self.load()
+            except Exception as e:
+                logger.info(f"FinBERT warm-up failed: {e}")
+        threading.Thread(target=_load, daemon=True).start()
+
+    @staticmethod
+    def _key(ticker, text):
+        return ticker, hashlib.sha1(text.encode()).hexdigest()
+
+    def score(self, items):
+        """
+        Scores for (ticker, text) pairs, in order. Uncached texts go through the
+        pipeline together in batches of `batch_size`.
+        """
+        keys = [self._key(t, text) for t, text in items]
+        results = {}
+        with self.lock:
+            for key in keys:
+                if key in self.scores:
+                    self.scores.move_to_end(key)
+                    results[key] = self.scores[key]
+
+        # Same text for the same ticker is scored once
+        todo = {}
+        for key, (_, text) in zip(keys, items):
+            if key not in results:
+                todo.setdefault(key, text)
+        if todo:
+            outputs = self.load()(list(todo.values()), batch_size=self.batch_size, truncation=True)
+            with self.lock:
+                for key, out in zip(todo, outputs):
+                    results[key] = {"label": out["label"], "score": float(out["score"])}
+                    self.scores[key] = results[key]
+                while len(self.scores) > self.maxsize:
+                    self.scores.popitem(last=False)
+        return [results[key] for key in keys]
+
+
+sentiment_service = SentimentService()
@@ -0,0 +1,89 @@
+"""
+Streaming quantile sketches for risk statistics
+Fixed-bin histograms: constant memory, mergeable across chunks and worker processes
+"""
+import numpy as np
+
+
+class QuantileSketch:
+    def __init__(self, lo, hi, bins=4096, log=False):
+        self.log = log
+        self.edges = np.geomspace(lo, hi, bins + 1) if log else np.linspace(lo, hi, bins + 1)
+        # Slot 0 collects values below lo, the last slot values above hi
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+        self.sums = np.zeros(bins + 2, dtype=np.float64)
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Add a batch of observations"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return self
+        slots = np.searchsorted(self.edges, values, side='right')
+        self.counts += np.bincount(slots, minlength=len(self.counts))
+        self.sums += np.bincount(slots, weights=values, minlength=len(self.sums))
+        self.n += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        return self
+
+    def merge(self, other):
+        """Fold another sketch with identical bins into this one"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge sketches with different bins")
+        self.counts += other.counts
+        self.sums += other.sums
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _slot_bounds(self, slot):
+        if slot == 0:
+            return self.min, self.edges[0]
+        if slot == len(self.counts) - 1:
+            return self.edges[-1], self.max
+        return self.edges[slot - 1], self.edges[slot]
+
+    def quantile(self, q):
+        """Approximate q-quantile, interpolated linearly inside its bin"""
+        if self.n == 0:
+            return np.nan
+        target = q * self.n
+        cum = np.cumsum(self.counts)
+        slot = int(np.searchsorted(cum, target, side='left'))
+        slot = min(slot, len(self.counts) - 1)
+        below = cum[slot] - self.counts[slot]
+        lo, hi = self._slot_bounds(slot)
+        lo, hi = max(lo, self.min), min(hi, self.max)
+        frac = (target - below) / self.counts[slot] if self.counts[slot] else 0.0
+        return float(lo + (hi - lo) * frac)
+
+    def tail_mean(self, q):
+        """Mean of the observations at or below the q-quantile (e.g. CVaR for q=0.05)"""
+        if self.n == 0:
+            return np.nan
+        target = max(q * self.n, 1)
+        cum = np.cumsum(self.counts)
+        slot = int(np.searchsorted(cum, target, side='left'))
+        slot = min(slot, len(self.counts) - 1)
+        below = cum[slot] - self.counts[slot]
+        total = self.sums[:slot].sum()
+        # Take the needed share of the boundary bin at its average value
+        if self.counts[slot]:
+            total += (target - below) * self.sums[slot] / self.counts[slot]
+        return float(total / target)
+
+    def histogram(self, bins=50):
+        """Re-bin the sketch into `bins` equal-width bars between the observed min and max"""
+        if self.n == 0:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+        edges = np.linspace(self.min, self.max, bins + 1)
+        centers = np.empty(len(self.counts))
+        nonzero = self.counts > 0
+        centers[nonzero] = self.sums[nonzero] / self.counts[nonzero]
+        counts, _ = np.histogram(centers[nonzero], bins=edges, weights=self.counts[nonzero])
+        return counts.astype(np.int64), edges
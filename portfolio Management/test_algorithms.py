@@ -2,7 +2,10 @@ import unittest
 import numpy as np
 import pandas as pd
 from pypfopt import expected_returns, risk_models
-from algorithms import run_black_litterman, run_hrp, run_monte_carlo
+import threading
+import time
+from algorithms import run_black_litterman, run_hrp, run_monte_carlo, HeadlineCache
+from risk_cache import risk_cache
 
 # Mock data for testing
 def get_mock_data():
@@ -22,6 +25,13 @@ class TestAlgorithms(unittest.TestCase):
         except Exception as e:
             print(f"HRP Test Warning: {e}")
 
+    def test_hrp_shares_cached_covariance(self):
+        risk_cache.clear()
+        run_hrp(self.prices)
+        hits = risk_cache.hits
+        risk_cache.sample_cov(self.prices)
+        self.assertEqual(risk_cache.hits, hits + 1)
+
     def test_black_litterman_weights(self):
         try:
             weights = run_black_litterman(self.prices, self.market_prices)
@@ -33,5 +43,82 @@ class TestAlgorithms(unittest.TestCase):
         sims = run_monte_carlo(self.prices, simulations=10, time_horizon=50)
         self.assertEqual(sims.shape, (10, 50))
 
+    def test_monte_carlo_rejects_zero_simulations(self):
+        with self.assertRaises(ValueError):
+            run_monte_carlo(self.prices, simulations=0, time_horizon=50)
+
+    def test_monte_carlo_seeded_chunks(self):
+        a = run_monte_carlo(self.prices, simulations=25, time_horizon=30, seed=7, chunk_size=4)
+        b = run_monte_carlo(self.prices, simulations=25, time_horizon=30, seed=7, chunk_size=4)
+        np.testing.assert_array_equal(a, b)
+
+    def test_monte_carlo_streaming(self):
+        res = run_monte_carlo(self.prices, simulations=2000, time_horizon=20, seed=1,
+                              dtype=np.float32, return_paths=False)
+        paths = run_monte_carlo(self.prices, simulations=2000, time_horizon=20, seed=1,
+                                dtype=np.float32)
+        final_values = paths[:, -1]
+        var_95 = np.percentile(final_values, 5)
+        self.assertAlmostEqual(res["var_95"], var_95, delta=0.01 * var_95)
+        self.assertAlmostEqual(res["cvar_95"], final_values[final_values <= var_95].mean(),
+                               delta=0.01 * var_95)
+        self.assertEqual(res["histogram"][0].sum(), 2000)
+        self.assertTrue(0 <= res["median_drawdown"] <= res["drawdown_95"] <= 1)
+
+    def test_monte_carlo_parallel_matches_serial(self):
+        kwargs = dict(simulations=120, time_horizon=15, seed=3, chunk_size=10, return_paths=False)
+        serial = run_monte_carlo(self.prices, n_workers=1, **kwargs)
+        parallel = run_monte_carlo(self.prices, n_workers=2, **kwargs)
+        np.testing.assert_array_equal(serial["histogram"][0], parallel["histogram"][0])
+        self.assertAlmostEqual(serial["var_95"], parallel["var_95"])
+
+    def test_monte_carlo_default_chunks_independent_of_workers(self):
+        serial = run_monte_carlo(self.prices, simulations=2500, time_horizon=10, seed=11, n_workers=1)
+        parallel = run_monte_carlo(self.prices, simulations=2500, time_horizon=10, seed=11, n_workers=2)
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_monte_carlo_weights(self):
+        only_a = run_monte_carlo(self.prices, simulations=50, time_horizon=10, seed=5,
+                                 weights={"A": 1.0})
+        as_array = run_monte_carlo(self.prices, simulations=50, time_horizon=10, seed=5,
+                                   weights=[2.0, 0.0, 0.0])
+        self.assertEqual(only_a.shape, (50, 10))
+        np.testing.assert_allclose(only_a, as_array)
+        with self.assertRaises(ValueError):
+            run_monte_carlo(self.prices, simulations=10, time_horizon=5, weights=[1.0, -1.0, 0.0])
+
+class FakeNewsLimiter:
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def ticker_attribute(self, ticker, attribute, key=None, max_retries=3):
+        with self.lock:
+            self.calls.append(ticker)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        if ticker == "QUIET":
+            return []
+        return [{"content": {"title": f"{ticker} headline {i}"}} for i in range(3)]
+
+
+class TestHeadlineCache(unittest.TestCase):
+    def test_concurrent_and_cached_per_ticker(self):
+        limiter = FakeNewsLimiter()
+        cache = HeadlineCache(limiter, max_workers=4)
+        headlines = cache.get(["A", "B", "C", "QUIET"], per_ticker=2)
+        self.assertEqual(headlines["A"], ["A headline 0", "A headline 1"])
+        self.assertEqual(headlines["QUIET"], [])
+        self.assertGreater(limiter.peak, 1)
+        # A rerun with one new ticker only fetches that one
+        cache.get(["A", "B", "C", "QUIET", "D"])
+        self.assertEqual(sorted(limiter.calls), ["A", "B", "C", "D", "QUIET"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+import time
+import unittest
+import pandas as pd
+from background_loader import BackgroundLoader
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.batches = []
+
+    def download_in_batches(self, tickers, start, end, ohlcv=False):
+        self.batches.append((list(tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        dates = pd.bdate_range(start, end, inclusive="left")
+        columns = pd.MultiIndex.from_product([["Close", "Volume"], [t for t in tickers if t != "BAD"]],
+                                             names=["Price", "Ticker"])
+        return pd.DataFrame(1.0, index=dates, columns=columns)
+
+    def download_with_retry(self, tickers, start, end):
+        dates = pd.bdate_range(start, end, inclusive="left")
+        return pd.DataFrame({"Close": 1.0}, index=dates)
+
+
+def wait_until_done(loader, timeout=5):
+    deadline = time.time() + timeout
+    while not loader.done and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestBackgroundLoader(unittest.TestCase):
+    def test_loads_in_batches(self):
+        limiter = FakeLimiter()
+        tickers = ["IDX", "BAD"] + [f"T{i}" for i in range(7)]
+        loader = BackgroundLoader(limiter, tickers, "2023-01-01", "2023-03-01", benchmark="IDX", batch_size=4)
+        loader.resume()
+        wait_until_done(loader)
+        prices, market_prices, failed, version = loader.snapshot()
+        self.assertEqual(len(limiter.batches), 2)
+        self.assertEqual(prices.shape[1], 7)
+        self.assertEqual(failed, {"BAD"})
+        self.assertFalse(market_prices.empty)
+        self.assertEqual(version, 3)
+
+    def test_window_change_fetches_only_gap(self):
+        limiter = FakeLimiter()
+        loader = BackgroundLoader(limiter, ["A", "B"], "2023-01-01", "2023-03-01")
+        loader.resume()
+        wait_until_done(loader)
+        loader.set_window("2023-02-01", "2023-04-01")
+        wait_until_done(loader)
+        prices = loader.snapshot()[0]
+        self.assertEqual(limiter.batches[-1], (["A", "B"], pd.Timestamp("2023-03-01"), pd.Timestamp("2023-04-01")))
+        self.assertEqual(prices.index.min(), pd.Timestamp("2023-02-01"))
+        self.assertEqual(prices.index.max(), pd.Timestamp("2023-03-31"))
+        volume = loader.bars_snapshot()["Volume"]
+        pd.testing.assert_index_equal(volume.index, prices.index)
+        self.assertEqual(list(volume.columns), ["A", "B"])
+
+    def test_window_without_overlap_refetches(self):
+        limiter = FakeLimiter()
+        loader = BackgroundLoader(limiter, ["A", "B"], "2023-01-01", "2023-03-01", benchmark="IDX")
+        loader.resume()
+        wait_until_done(loader)
+        loader.set_window("2024-01-01", "2024-03-01")
+        wait_until_done(loader)
+        prices, market_prices, failed, _ = loader.snapshot()
+        self.assertEqual(limiter.batches[-1], (["A", "B"], pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-01")))
+        self.assertEqual(list(prices.columns), ["A", "B"])
+        self.assertEqual(prices.index.min(), pd.Timestamp("2024-01-01"))
+        self.assertEqual(market_prices.index.min(), pd.Timestamp("2024-01-01"))
+        self.assertEqual(failed, set())
+        loader.stop()
+
+    def test_pause_holds_work(self):
+        limiter = FakeLimiter()
+        loader = BackgroundLoader(limiter, ["A"], "2023-01-01", "2023-02-01")
+        loader.pause()
+        loader.ensure_running()
+        time.sleep(0.1)
+        self.assertEqual(limiter.batches, [])
+        # A paused loader keeps no thread around
+        self.assertFalse(loader.running)
+        loader.resume()
+        wait_until_done(loader)
+        self.assertEqual(len(limiter.batches), 1)
+        loader.stop()
+
+    def test_stopped_loader_does_no_more_work(self):
+        limiter = FakeLimiter()
+        loader = BackgroundLoader(limiter, ["A"], "2023-01-01", "2023-02-01")
+        loader.pause()
+        loader.ensure_running()
+        loader.stop()
+        loader.resume()
+        time.sleep(0.1)
+        self.assertFalse(loader.running)
+        self.assertEqual(limiter.batches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
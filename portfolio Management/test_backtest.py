@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backtest import walk_forward, rebalance_dates, rolling_covariances
+from algorithms import run_hrp
+
+
+def make_prices(n=400, k=5, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n)
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (n, k)), axis=0)),
+                        index=dates, columns=[f"T{i}" for i in range(k)])
+
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        self.prices = make_prices()
+        self.returns = self.prices.pct_change().iloc[1:]
+
+    def test_rolling_cov_matches_window(self):
+        dates = rebalance_dates(self.returns.index, 60)
+        self.assertTrue(all(d.day <= 7 for d in dates[1:]))
+        covs = rolling_covariances(self.returns, dates, 60)
+        for date in dates[[0, -1]]:
+            window = self.returns.loc[:date].iloc[-60:]
+            np.testing.assert_allclose(covs[date].values, window.cov().values * 252, rtol=1e-8)
+
+    def test_equal_weight_matches_manual(self):
+        result = walk_forward(self.prices, strategy="Equal-Weight", lookback=60)
+        dates = result["weights"].index
+        # Manual: buy-and-hold equal weights between consecutive rebalance dates
+        value = 1.0
+        bounds = list(dates) + [None]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            value *= (1 + self.returns.loc[start:end].iloc[1:]).prod().mean()
+        self.assertAlmostEqual(result["equity"].iloc[-1], value, places=10)
+        self.assertAlmostEqual(result["turnover"].iloc[0], 0.5)
+        self.assertLessEqual(result["stats"]["max_drawdown"], 0)
+
+    def test_missing_first_bars_keep_tickers(self):
+        prices = make_prices(k=4)
+        prices.iloc[0, 2] = np.nan  # e.g. an exchange holiday on the first date
+        prices.iloc[::7, 3] = np.nan
+        prices["EMPTY"] = np.nan
+        with self.assertLogs("backtest", level="WARNING"):
+            result = walk_forward(prices, strategy="Equal-Weight", lookback=60)
+        self.assertEqual(list(result["weights"].columns), ["T0", "T1", "T2", "T3"])
+
+    def test_hrp_parallel_matches_serial(self):
+        serial = walk_forward(self.prices, strategy="HRP", lookback=120, cost_bps=10)
+        parallel = walk_forward(self.prices, strategy="HRP", lookback=120, cost_bps=10, n_workers=2)
+        pd.testing.assert_frame_equal(serial["weights"], parallel["weights"])
+        first = serial["weights"].index[0]
+        window = self.returns.loc[:first].iloc[-120:]
+        expected = pd.Series(run_hrp(None, cov_matrix=window.cov() * 252))
+        np.testing.assert_allclose(serial["weights"].loc[first], expected[serial["weights"].columns], rtol=1e-6)
+        self.assertGreater(serial["stats"]["avg_turnover"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from unittest import mock
+import numpy as np
+from benchmark_algorithms import SWEEPS, synthetic_panel, run_suite, compare_results
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_synthetic_panel(self):
+        prices, market = synthetic_panel(20, 300, seed=1)
+        self.assertEqual(prices.shape, (300, 20))
+        self.assertTrue(market.index.equals(prices.index))
+        corr = np.log(prices).diff().corr().values
+        self.assertGreater(corr[np.triu_indices(20, k=1)].mean(), 0.1)
+        a, _ = synthetic_panel(20, 300, seed=1)
+        self.assertTrue(a.equals(prices))
+
+    def test_run_and_compare(self):
+        with mock.patch.dict(SWEEPS, {"hrp": {"quick": {"n_assets": [5], "n_days": [100]}}}):
+            report = run_suite(["hrp"], quick=True, repeat=2, log=lambda m: None)
+        (result,) = report["results"]
+        self.assertEqual(result["params"], {"n_assets": 5, "n_days": 100})
+        self.assertEqual(len(result["times_s"]), 2)
+        self.assertGreater(result["peak_mb"], 0)
+
+        slower = {"results": [dict(result, median_s=result["median_s"] * 2)]}
+        (row,) = compare_results(report, slower, threshold=0.25)
+        self.assertTrue(row["regression"])
+        self.assertAlmostEqual(row["time_ratio"], 2.0)
+        (row,) = compare_results(report, report)
+        self.assertFalse(row["regression"])
+
+
+if __name__ == '__main__':
+    unittest.main()
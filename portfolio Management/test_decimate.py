@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import pandas as pd
+from decimate import lttb_indices, minmax_indices, decimate_series, resample_ohlc, fan_bands
+
+
+class TestDecimate(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = np.cumsum(rng.normal(size=20000))
+        self.y[12345] += 500  # A spike any good reduction must keep
+
+    def test_lttb_keeps_ends_and_spike(self):
+        idx = lttb_indices(self.y, 1000)
+        self.assertEqual(len(idx), 1000)
+        self.assertEqual((idx[0], idx[-1]), (0, len(self.y) - 1))
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertIn(12345, idx)
+
+    def test_minmax_keeps_extremes(self):
+        idx = minmax_indices(self.y, 1000)
+        self.assertLessEqual(len(idx), 1002)
+        self.assertIn(int(np.argmax(self.y)), idx)
+        self.assertIn(int(np.argmin(self.y)), idx)
+
+    def test_short_series_untouched(self):
+        dates = pd.bdate_range("2020-01-01", periods=100)
+        series = pd.Series(np.arange(100.0), index=dates)
+        series.iloc[:10] = np.nan
+        pd.testing.assert_series_equal(decimate_series(series, 500), series.dropna())
+        self.assertEqual(len(decimate_series(pd.Series(self.y), 500)), 500)
+
+    def test_resample_ohlc(self):
+        dates = pd.bdate_range("2000-01-03", periods=5000)
+        close = pd.Series(self.y[:5000] + 1000, index=dates)
+        candles = resample_ohlc(close - 1, close + 2, close - 2, close, pd.Series(1.0, index=dates), max_points=500)
+        self.assertEqual(len(candles), 500)
+        self.assertEqual(candles.index[0], dates[0])
+        self.assertEqual(candles["High"].max(), close.max() + 2)
+        self.assertEqual(candles["Close"].iloc[-1], close.iloc[-1])
+        self.assertEqual(candles["Volume"].sum(), 5000)
+
+    def test_fan_bands(self):
+        paths = np.random.default_rng(1).normal(size=(5000, 300)).cumsum(axis=1)
+        steps, bands = fan_bands(paths, max_points=100)
+        self.assertEqual(len(steps), 100)
+        self.assertTrue(np.all(bands[5] <= bands[50]) and np.all(bands[50] <= bands[95]))
+        np.testing.assert_allclose(bands[50], np.median(paths[:, steps], axis=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
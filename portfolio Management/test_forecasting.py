@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from algorithms import HAS_TF, make_windows, run_lstm_prediction, run_batch_lstm_forecast
+from model_registry import ModelRegistry
+
+
+def make_closes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=dates, name="AAA")
+
+
+class TestWindows(unittest.TestCase):
+    def test_matches_loop(self):
+        values = np.arange(10, dtype=float)
+        x, y = make_windows(values, 4)
+        self.assertEqual(x.shape, (6, 4, 1))
+        np.testing.assert_array_equal(x[2, :, 0], [2, 3, 4, 5])
+        np.testing.assert_array_equal(y, values[4:])
+
+
+@unittest.skipUnless(HAS_TF, "TensorFlow not installed")
+class TestLSTMRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_warm_start_fine_tunes_new_bars_only(self):
+        closes = make_closes(120)
+        kwargs = dict(window=20, units=8, epochs=2, registry=self.registry)
+        run_lstm_prediction(closes.iloc[:115], **kwargs)
+        (model, meta), = self.registry.loaded.values()
+        self.assertEqual(meta["bars"], 114)
+
+        fits = []
+        original_fit = model.fit
+        model.fit = lambda x, y, **kw: fits.append(len(x)) or original_fit(x, y, **kw)
+        price, _ = run_lstm_prediction(closes, **kwargs)
+        run_lstm_prediction(closes, **kwargs)
+        self.assertEqual(fits, [5])  # Only the 5 new bars, and nothing once up to date
+        self.assertGreater(price, 0)
+
+        # A fresh registry on the same directory loads the saved model from disk
+        reloaded = ModelRegistry(self.tmp.name)
+        run_lstm_prediction(closes, **{**kwargs, "registry": reloaded})
+        (_, meta), = reloaded.loaded.values()
+        self.assertEqual(meta["bars"], 119)
+
+    def test_batch_forecast_shares_one_model(self):
+        prices = pd.concat({t: make_closes(100, seed=i) for i, t in enumerate("ABC")}, axis=1)
+        prices.iloc[:70, 2] = np.nan  # Too short to forecast
+        kwargs = dict(window=10, units=4, epochs=1, registry=self.registry)
+        result = run_batch_lstm_forecast(prices.iloc[:, :2], **kwargs)
+        self.assertEqual(list(result.index), ["A", "B"])
+        self.assertTrue(np.all(result["Forecast"] > 0))
+        (model, _), = self.registry.loaded.values()
+
+        fits = []
+        original_fit = model.fit
+        model.fit = lambda x, y, **kw: fits.append(len(x)) or original_fit(x, y, **kw)
+        grown = pd.concat({t: make_closes(103, seed=i) for i, t in enumerate("ABD")}, axis=1)
+        result = run_batch_lstm_forecast(grown, **kwargs)
+        # 3 new bars each for A and B, every window of the unseen D
+        self.assertEqual(fits, [3 + 3 + 92])
+        self.assertEqual(list(result.index), ["A", "B", "D"])
+
+
+if __name__ == '__main__':
+    unittest.main()
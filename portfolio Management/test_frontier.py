@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+import pandas as pd
+from pypfopt import EfficientFrontier
+from frontier import efficient_frontier, FRONTIER_SOLVER
+
+
+def make_inputs(n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 3))
+    cov = factors @ factors.T * 0.01 + np.diag(rng.uniform(0.01, 0.09, n))
+    names = [f"A{i}" for i in range(n)]
+    return pd.Series(rng.uniform(0.02, 0.3, n), index=names), pd.DataFrame(cov, index=names, columns=names)
+
+
+class TestEfficientFrontier(unittest.TestCase):
+    def setUp(self):
+        self.mu, self.cov = make_inputs()
+
+    def test_matches_independent_solves(self):
+        points, weights = efficient_frontier(self.mu, self.cov, n_points=15)
+        self.assertEqual(weights.shape, (15, len(self.mu)))
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0, atol=1e-6)
+        self.assertTrue(np.all(np.diff(points["volatility"]) > -1e-8))
+        for i in (0, 7, 14):
+            ef = EfficientFrontier(self.mu, self.cov, solver=FRONTIER_SOLVER)
+            ef.efficient_return(points["target"][i])
+            vol = np.sqrt(ef.weights @ self.cov.values @ ef.weights)
+            self.assertAlmostEqual(points["volatility"][i], vol, places=5)
+
+    def test_parallel_and_risk_sweep(self):
+        serial, _ = efficient_frontier(self.mu, self.cov, n_points=10)
+        parallel, _ = efficient_frontier(self.mu, self.cov, n_points=10, n_workers=3)
+        np.testing.assert_allclose(parallel["volatility"], serial["volatility"], rtol=1e-6)
+        points, _ = efficient_frontier(self.mu, self.cov, n_points=10, sweep="risk")
+        np.testing.assert_allclose(points["volatility"], points["target"], rtol=1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
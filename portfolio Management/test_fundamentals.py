@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+import pandas as pd
+from fundamentals import FieldCache, MarketCapProvider, FundamentalsStore
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.calls = []
+
+    def ticker_attribute(self, ticker, attribute, key=None, max_retries=3):
+        self.calls.append((ticker, attribute))
+        value = {} if ticker == "NOCAP" else {"marketCap": 1e9}
+        return value.get(key) if key is not None else value
+
+
+class TestMarketCapProvider(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FieldCache(os.path.join(self.tmp.name, "fields.db"))
+        self.limiter = FakeLimiter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_on_disk(self):
+        provider = MarketCapProvider(self.limiter, self.cache)
+        self.assertEqual(provider.get_many(["A", "B"]), {"A": 1e9, "B": 1e9})
+        self.assertEqual(len(self.limiter.calls), 2)
+        again = MarketCapProvider(self.limiter, FieldCache(self.cache.path))
+        self.assertEqual(again.get_many(["B", "A"]), {"B": 1e9, "A": 1e9})
+        self.assertEqual(len(self.limiter.calls), 2)
+
+    def test_stale_and_missing_refetched(self):
+        MarketCapProvider(self.limiter, self.cache).get_many(["A"])
+        provider = MarketCapProvider(self.limiter, self.cache, max_age=timedelta(seconds=-1))
+        self.assertEqual(provider.get_many(["A", "NOCAP"]), {"A": 1e9, "NOCAP": 0})
+        self.assertIn(("NOCAP", "info"), self.limiter.calls)
+        self.assertEqual(self.limiter.calls.count(("A", "fast_info")), 2)
+
+
+class FakeInfoLimiter:
+    def __init__(self):
+        self.calls = []
+        self.busy = False
+
+    def idle(self):
+        return not self.busy
+
+    def ticker_attribute(self, ticker, attribute, key=None, max_retries=3):
+        self.calls.append((ticker, attribute))
+        if ticker == "DOWN":
+            return None
+        if attribute == "info":
+            return {"longName": f"{ticker} Corp", "trailingPE": 20.5, "exDividendDate": pd.Timestamp("2024-05-01")}
+        if ticker == "NORECS":
+            return pd.DataFrame()
+        return pd.DataFrame({"period": ["0m", "-1m"], "strongBuy": [3, 2]})
+
+
+def drain(store, timeout=2):
+    deadline = time.time() + timeout
+    while store.running and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestFundamentalsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FieldCache(os.path.join(self.tmp.name, "fields.db"))
+        self.limiter = FakeInfoLimiter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, **kwargs):
+        return FundamentalsStore(self.limiter, self.cache, idle_wait=0.01, **kwargs)
+
+    def test_page_reads_cache_only(self):
+        store = self.store()
+        self.limiter.busy = True
+        # Nothing stored yet: a placeholder now, the fetch happens in the background
+        self.assertEqual(store.get("A"), {"info": None, "recommendations": None})
+        time.sleep(0.05)
+        self.assertEqual(self.limiter.calls, [])
+        self.limiter.busy = False
+        drain(store)
+        first = store.get("A")
+        self.assertEqual(first["info"]["longName"], "A Corp")
+        self.assertEqual(list(first["recommendations"]["strongBuy"]), [3, 2])
+        other = FundamentalsStore(self.limiter, FieldCache(self.cache.path))
+        again = other.get("A")
+        self.assertEqual(again["info"], first["info"])
+        pd.testing.assert_frame_equal(again["recommendations"], first["recommendations"])
+        # Fresh on disk: nothing is queued
+        self.assertFalse(other.running)
+        self.assertEqual(len(self.limiter.calls), 2)
+
+    def test_per_field_staleness(self):
+        self.store()._refresh("A")
+        fields = {"info": timedelta(seconds=-1), "recommendations": timedelta(days=7)}
+        self.store(fields=fields)._refresh("A")
+        self.assertEqual(self.limiter.calls.count(("A", "info")), 2)
+        self.assertEqual(self.limiter.calls.count(("A", "recommendations")), 1)
+
+    def test_failures_cached_for_ttl(self):
+        store = self.store()
+        store.prefetch(["NORECS", "DOWN"])
+        drain(store)
+        self.assertIsNone(store.get("NORECS")["recommendations"])
+        self.assertEqual(store.get("DOWN"), {"info": None, "recommendations": None})
+        drain(store)
+        self.assertEqual(self.limiter.calls.count(("DOWN", "info")), 1)
+        # Once the failure TTL has passed, only the failed ticker is fetched again
+        store = self.store(failure_ttl=timedelta(seconds=0))
+        store.prefetch(["NORECS", "DOWN"])
+        drain(store)
+        store.prefetch(["NORECS", "DOWN"])
+        drain(store)
+        self.assertEqual(self.limiter.calls.count(("NORECS", "recommendations")), 1)
+        self.assertEqual(self.limiter.calls.count(("DOWN", "info")), 3)
+
+    def test_prefetch_in_background(self):
+        store = self.store()
+        store.prefetch(["A", "B"])
+        store.prefetch(["A", "B"])
+        drain(store)
+        self.assertEqual(len(self.limiter.calls), 4)
+        store.get("B")
+        drain(store)
+        self.assertEqual(len(self.limiter.calls), 4)
+
+if __name__ == '__main__':
+    unittest.main()
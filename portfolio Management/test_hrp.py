@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+import pandas as pd
+import scipy.cluster.hierarchy as sch
+from pypfopt import HRPOpt
+from hrp import HRPEngine, correlation_distance, mst_linkage, _mst_edges
+
+
+def make_returns(n_assets, n_obs=300, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_obs, 4))
+    data = factors @ rng.normal(size=(4, n_assets)) + rng.normal(size=(n_obs, n_assets))
+    return pd.DataFrame(data * 0.01, columns=[f"T{i:03d}" for i in range(n_assets)])
+
+
+class TestHRPEngine(unittest.TestCase):
+    def test_mst_linkage_matches_scipy(self):
+        corr = make_returns(40).corr().values
+        dist = correlation_distance(corr)
+        rows, cols = np.triu_indices(40, k=1)
+        link = mst_linkage(*_mst_edges(rows, cols, dist[rows, cols], 40), 40)
+        expected = sch.linkage(dist[rows, cols], "single")
+        np.testing.assert_allclose(link, expected)
+
+    def test_matches_hrpopt(self):
+        returns = make_returns(60)
+        engine = HRPEngine()
+        for method in ("single", "ward"):
+            weights = engine.weights(returns.cov(), method)
+            expected = pd.Series(HRPOpt(cov_matrix=returns.cov()).optimize(linkage_method=method))
+            pd.testing.assert_series_equal(weights, expected, check_names=False, rtol=1e-8)
+
+    def test_cached_and_incremental(self):
+        returns = make_returns(50)
+        engine = HRPEngine()
+        small = returns.iloc[:, :45]
+        engine.weights(small.cov())
+        engine.weights(small.cov())
+        self.assertEqual((engine.hits, engine.misses), (1, 1))
+        # Five tickers added: the tree grows from the cached one
+        weights = engine.weights(returns.cov())
+        self.assertEqual(engine.incremental, 1)
+        pd.testing.assert_series_equal(weights, HRPEngine().weights(returns.cov()))
+
+
+if __name__ == '__main__':
+    unittest.main()
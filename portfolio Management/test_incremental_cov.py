@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from incremental_cov import IncrementalCovariance
+from risk_cache import RiskModelCache
+
+
+def make_returns(n=300, k=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 0.01, (n, k)) @ rng.normal(0, 1, (k, k))
+
+
+class TestIncrementalCovariance(unittest.TestCase):
+    def test_expanding_matches_numpy(self):
+        data = make_returns()
+        acc = IncrementalCovariance(4).update_many(data)
+        np.testing.assert_allclose(acc.cov, np.cov(data, rowvar=False), rtol=1e-10)
+        np.testing.assert_allclose(acc.mean, data.mean(axis=0), rtol=1e-10)
+
+    def test_rolling_matches_last_window(self):
+        data = make_returns()
+        acc = IncrementalCovariance(4, window=60).update_many(data)
+        np.testing.assert_allclose(acc.cov, np.cov(data[-60:], rowvar=False), rtol=1e-8)
+
+    def test_ewma_matches_recursion(self):
+        data = make_returns(n=50)
+        acc = IncrementalCovariance(4, halflife=10).update_many(data)
+        alpha = 1 - 0.5 ** (1 / 10)
+        frame = pd.DataFrame(data)
+        expected = frame.ewm(alpha=alpha, adjust=False).cov(bias=True).loc[49].values
+        np.testing.assert_allclose(acc.cov, expected, rtol=1e-8)
+
+
+class TestStreamingCov(unittest.TestCase):
+    def test_incremental_refresh_matches_full(self):
+        rng = np.random.default_rng(3)
+        dates = pd.bdate_range("2023-01-02", periods=200)
+        prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (200, 3)), axis=0)),
+                              index=dates, columns=list("ABC"))
+        cache = RiskModelCache()
+        cache.streaming_cov(prices.iloc[:150], window=40)
+        revised = prices.copy()
+        revised.iloc[-1] *= 1.01  # Newest bar revised intraday
+        cache.streaming_cov(prices, window=40)
+        cov = cache.streaming_cov(revised, window=40)
+        expected = revised.pct_change().iloc[-40:].cov()
+        np.testing.assert_allclose(cov.values, expected.values, rtol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
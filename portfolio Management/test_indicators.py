@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD
+from ta.volatility import BollingerBands
+from indicators import IndicatorCache
+
+
+def make_prices(seed=0, n=200, k=4):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=n)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, k)), axis=0)),
+                          index=dates, columns=[f"T{i}" for i in range(k)])
+    prices.iloc[:30, 1] = np.nan  # Listed later than the others
+    return prices
+
+
+class TestIndicatorCache(unittest.TestCase):
+    def test_matches_ta_per_ticker(self):
+        prices = make_prices()
+        cache = IndicatorCache()
+        rsi = cache.rsi(prices)
+        bands = cache.bollinger(prices)
+        macd = cache.macd(prices)
+        for t in prices.columns:
+            close = prices[t]
+            np.testing.assert_allclose(rsi[t], RSIIndicator(close, window=14).rsi(), rtol=1e-10)
+            bb = BollingerBands(close, window=20, window_dev=2)
+            np.testing.assert_allclose(bands["upper"][t], bb.bollinger_hband(), rtol=1e-10)
+            np.testing.assert_allclose(bands["lower"][t], bb.bollinger_lband(), rtol=1e-10)
+            ref = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+            np.testing.assert_allclose(macd["macd"][t], ref.macd(), rtol=1e-10)
+            np.testing.assert_allclose(macd["signal"][t], ref.macd_signal(), rtol=1e-10)
+            np.testing.assert_allclose(macd["hist"][t], ref.macd_diff(), rtol=1e-10)
+
+    def test_only_changed_tickers_recomputed(self):
+        prices = make_prices()
+        cache = IndicatorCache()
+        first = cache.rsi(prices)
+        changed = prices.copy()
+        changed.iloc[-1, 0] *= 1.05
+        second = cache.rsi(changed)
+        self.assertEqual((cache.misses, cache.hits), (5, 3))
+        pd.testing.assert_series_equal(second["T2"], first["T2"])
+        self.assertNotEqual(second["T0"].iloc[-1], first["T0"].iloc[-1])
+        # Different parameters are separate entries
+        cache.rsi(prices, window=7)
+        self.assertEqual(cache.misses, 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
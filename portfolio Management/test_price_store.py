@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from price_store import PriceStore, date_gaps
+from rate_limiter import YFinanceRateLimiter
+
+
+def make_closes(start, end):
+    dates = pd.bdate_range(start, end, inclusive="left")
+    return pd.Series(range(len(dates)), index=dates, dtype=float, name="Close")
+
+
+def make_bars(start, end):
+    closes = make_closes(start, end)
+    return pd.DataFrame({"Open": closes - 0.5, "High": closes + 1, "Low": closes - 1,
+                         "Close": closes, "Volume": 1000.0})
+
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PriceStore(os.path.join(self.tmp.name, "prices.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_date_gaps(self):
+        covered = [("2023-01-10", "2023-02-01"), ("2023-03-01", "2023-04-01")]
+        gaps = date_gaps(covered, "2023-01-01", "2023-05-01")
+        self.assertEqual(gaps, [
+            (pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-10")),
+            (pd.Timestamp("2023-02-01"), pd.Timestamp("2023-03-01")),
+            (pd.Timestamp("2023-04-01"), pd.Timestamp("2023-05-01")),
+        ])
+        self.assertEqual(date_gaps([("2022-01-01", "2024-01-01")], "2023-01-01", "2023-05-01"), [])
+
+    def test_write_read_and_coverage(self):
+        self.store.write("AAA", make_closes("2023-01-01", "2023-02-01"), "2023-01-01", "2023-02-01")
+        self.store.write("AAA", make_closes("2023-02-01", "2023-03-01"), "2023-02-01", "2023-03-01")
+        self.assertEqual(self.store.coverage("AAA"), [(pd.Timestamp("2023-01-01"), pd.Timestamp("2023-03-01"))])
+        self.assertEqual(self.store.missing_ranges("AAA", "2023-01-15", "2023-02-15"), [])
+        closes = self.store.read("AAA", "2023-01-01", "2023-03-01")
+        self.assertEqual(len(closes), len(pd.bdate_range("2023-01-01", "2023-03-01", inclusive="left")))
+
+    def test_long_empty_gap_not_recorded(self):
+        self.store.write("BBB", pd.Series(dtype=float), "2023-01-01", "2023-06-01")
+        self.assertEqual(self.store.coverage("BBB"), [])
+
+    def test_rate_limiter_fetches_only_gaps(self):
+        limiter = YFinanceRateLimiter(store=self.store)
+        calls = []
+
+        def fake_fetch(ticker, start, end, max_retries=3, allow_empty=False):
+            calls.append((start, end))
+            return make_bars(start, end)
+
+        limiter._fetch_bars = fake_fetch
+        limiter.download_single_ticker("CCC", "2023-01-01", "2023-03-01")
+        closes = limiter.download_single_ticker("CCC", "2023-01-01", "2023-04-01")
+        self.assertEqual(calls[1], (pd.Timestamp("2023-03-01"), pd.Timestamp("2023-04-01")))
+        self.assertEqual(closes.index.min(), pd.Timestamp("2023-01-02"))
+        limiter.download_single_ticker("CCC", "2023-02-01", "2023-03-01")
+        bars = limiter.download_single_ticker("CCC", "2023-01-01", "2023-04-01", ohlcv=True)
+        self.assertEqual(len(calls), 2)
+        pd.testing.assert_series_equal(bars["Close"], closes)
+
+    def test_empty_short_gap_recorded_as_covered(self):
+        limiter = YFinanceRateLimiter(store=self.store)
+        single = []
+        limiter._download_batch = lambda tickers, start, end: pd.DataFrame()
+        limiter.download_single_ticker = lambda ticker, *args, **kwargs: single.append(ticker)
+        for ticker in ("FFF", "GGG"):
+            self.store.write(ticker, make_bars("2023-01-02", "2023-01-07"), "2023-01-02", "2023-01-07")
+        # Saturday to Sunday: no trading days, so the batch answer is empty
+        closes = limiter.download_in_batches(["FFF", "GGG"], "2023-01-02", "2023-01-08")
+        self.assertEqual(single, [])
+        self.assertEqual(list(closes.columns), ["FFF", "GGG"])
+        self.assertEqual(self.store.missing_ranges("FFF", "2023-01-02", "2023-01-08"), [])
+
+    def test_bars_round_trip(self):
+        bars = make_bars("2023-01-01", "2023-02-01")
+        self.store.write("DDD", bars, "2023-01-01", "2023-02-01")
+        stored = self.store.read_bars("DDD", "2023-01-01", "2023-02-01")
+        pd.testing.assert_frame_equal(stored, bars.rename_axis("Date"), check_freq=False)
+
+    def test_close_only_store_is_migrated(self):
+        path = os.path.join(self.tmp.name, "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE prices (ticker TEXT NOT NULL, date TEXT NOT NULL, close REAL, "
+                         "PRIMARY KEY (ticker, date)) WITHOUT ROWID")
+            conn.execute("CREATE TABLE coverage (ticker TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL)")
+            conn.execute("INSERT INTO prices VALUES ('EEE', '2023-01-03', 1.0)")
+            conn.execute("INSERT INTO coverage VALUES ('EEE', '2023-01-01', '2023-02-01')")
+        conn.close()
+        store = PriceStore(path)
+        # Old rows have no bars, so their range is fetched again
+        self.assertEqual(store.coverage("EEE"), [])
+        self.assertEqual(store.read("EEE", "2023-01-01", "2023-02-01").tolist(), [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quotes import QuoteService
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.calls = []
+
+    def download_with_retry(self, tickers, start, end, max_retries=3):
+        self.calls.append(list(tickers))
+        index = pd.bdate_range("2024-01-01", periods=3)
+        frames = {t: pd.DataFrame({"Close": [100.0, 100.0, 110.0]}, index=index)
+                  for t in tickers if t != "MISSING"}
+        frames["MISSING"] = pd.DataFrame({"Close": [np.nan] * 3}, index=index)
+        return pd.concat({t: frames[t] for t in tickers}, axis=1)
+
+
+class TestQuoteService(unittest.TestCase):
+    def test_one_batched_fetch_then_cached(self):
+        limiter = FakeLimiter()
+        service = QuoteService(limiter, ttl=60)
+        quotes = service.get(["^VIX", "GC=F", "MISSING"])
+        self.assertEqual(limiter.calls, [["^VIX", "GC=F", "MISSING"]])
+        self.assertAlmostEqual(quotes["^VIX"]["price"], 110.0)
+        self.assertAlmostEqual(quotes["GC=F"]["change_pct"], 10.0)
+        self.assertEqual(quotes["GC=F"]["as_of"], "2024-01-03")
+        self.assertIsNone(quotes["MISSING"])
+        # Within the TTL only unknown tickers are fetched
+        service.get(["GC=F", "MISSING"])
+        service.get(["GC=F", "CL=F"])
+        self.assertEqual(limiter.calls, [["^VIX", "GC=F", "MISSING"], ["CL=F"]])
+
+    def test_expired_refetched(self):
+        limiter = FakeLimiter()
+        service = QuoteService(limiter, ttl=0)
+        service.get(["^TNX"])
+        service.get(["^TNX"])
+        self.assertEqual(len(limiter.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import unittest
+import pandas as pd
+from rate_limiter import TokenBucket, YFinanceRateLimiter, backoff_delay
+from async_downloader import AsyncDownloader
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced(self):
+        bucket = TokenBucket(rate=10.0, capacity=3)
+        waits = [bucket.reserve() for _ in range(5)]
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[4], 0.2, delta=0.02)
+
+
+    def test_backoff_jittered_and_capped(self):
+        delays = [backoff_delay(1) for _ in range(50)]
+        self.assertTrue(all(15 <= d <= 45 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertLessEqual(backoff_delay(10), 180)
+
+
+class TestAsyncDownloader(unittest.TestCase):
+    def setUp(self):
+        self.limiter = YFinanceRateLimiter(calls_per_minute=60000, burst=100)
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = []
+
+    def fake_batch(self, tickers, start, end):
+        self.requests.append(list(tickers))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        self.in_flight -= 1
+        dates = pd.bdate_range(start, end, inclusive="left")
+        columns = pd.MultiIndex.from_product([tickers, ["Close", "Volume"]], names=["Ticker", "Price"])
+        return pd.DataFrame(1.0, index=dates, columns=columns)
+
+    def test_requests_overlap_up_to_limit(self):
+        self.limiter._download_batch = self.fake_batch
+        data = AsyncDownloader(self.limiter, max_in_flight=2, batch_size=2).download(
+            [f"T{i}" for i in range(12)], "2023-01-01", "2023-02-01")
+        self.assertEqual(data.shape[1], 12)
+        self.assertGreater(self.peak, 1)
+        self.assertLessEqual(self.peak, 2)
+
+    def test_tickers_batched_per_request(self):
+        self.limiter._download_batch = self.fake_batch
+        data = AsyncDownloader(self.limiter, batch_size=5).download(
+            [f"T{i}" for i in range(12)], "2023-01-01", "2023-02-01")
+        self.assertEqual(data.shape[1], 12)
+        self.assertEqual(sorted(len(r) for r in self.requests), [2, 5, 5])
+
+    def test_failed_batch_falls_back_to_single_tickers(self):
+        def empty_batch(tickers, start, end):
+            self.requests.append(list(tickers))
+            return pd.DataFrame()
+
+        singles = []
+
+        def history(ticker, start, end):
+            singles.append(ticker)
+            return pd.DataFrame({"Close": [1.0]}, index=[pd.Timestamp(start)])
+
+        self.limiter._download_batch = empty_batch
+        self.limiter._history_once = history
+        data = AsyncDownloader(self.limiter).download(["AAA", "BBB"], "2023-01-02", "2023-03-01")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(sorted(singles), ["AAA", "BBB"])
+        self.assertEqual(sorted(data.columns), ["AAA", "BBB"])
+
+    def test_backs_off_after_429(self):
+        attempts = []
+
+        def flaky(tickers, start, end):
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise RuntimeError("429 Too Many Requests")
+            return pd.DataFrame({"Close": [1.0]}, index=[pd.Timestamp(start)])
+
+        self.limiter._download_batch = flaky
+        downloader = AsyncDownloader(self.limiter, base_backoff=0.1)
+        data = downloader.download(["AAA"], "2023-01-02", "2023-01-03")
+        self.assertEqual(len(attempts), 2)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.05)
+        self.assertIn("AAA", data.columns)
+
+if __name__ == '__main__':
+    unittest.main()
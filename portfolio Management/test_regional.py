@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+import pandas as pd
+from rate_limiter import YFinanceRateLimiter
+from regional import RegionalPanels, REGION_TICKERS
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.calls = []
+
+    def download_concurrent(self, tickers, start, end, max_in_flight=4, batch_size=5):
+        self.calls.append((tuple(tickers), start, end))
+        index = pd.bdate_range(start, end, inclusive="left")
+        rng = np.random.default_rng(len(self.calls))
+        data = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), len(tickers))), axis=0))
+        prices = pd.DataFrame(data, index=index, columns=tickers)
+        prices.iloc[0, 0] = np.nan  # e.g. a holiday on one exchange
+        return prices
+
+
+class TestRegionalPanels(unittest.TestCase):
+    def setUp(self):
+        self.limiter = FakeLimiter()
+        self.panels = RegionalPanels(self.limiter, regions={"R": ["A", "B", "C"]}, refresh_interval=3600)
+
+    def tearDown(self):
+        self.panels.stop()
+
+    def test_shared_and_precomputed(self):
+        end = pd.Timestamp.now() + pd.Timedelta(days=1)
+        first = self.panels.get("R", "2024-01-01", end)
+        again = self.panels.get("R", "2024-01-01", end)
+        self.assertIs(first, again)
+        self.assertEqual(len(self.limiter.calls), 1)
+        self.assertTrue((first["normalized"].bfill().iloc[0] == 100).all())
+        self.assertEqual(first["corr"].shape, (3, 3))
+
+    def test_sub_window_and_earlier_start(self):
+        self.panels.get("R", "2024-01-01", "2024-12-31")
+        view = self.panels.get("R", "2024-06-03", "2024-07-01")
+        self.assertIs(view, self.panels.get("R", "2024-06-03", "2024-07-01"))
+        self.assertEqual(len(self.limiter.calls), 1)
+        self.assertEqual(view["prices"].index[0], pd.Timestamp("2024-06-03"))
+        self.assertAlmostEqual(view["normalized"].iloc[0, 1], 100.0)
+        # Only a window starting before the held one triggers a fetch
+        self.panels.get("R", "2023-01-02", "2024-12-31")
+        self.assertEqual(len(self.limiter.calls), 2)
+        self.assertEqual(self.limiter.calls[-1][1], pd.Timestamp("2023-01-02"))
+
+    def test_refresh_replaces_panel(self):
+        old = self.panels.get("R", "2024-01-01", "2024-02-01")
+        self.panels.refresh("R")
+        self.assertIsNot(self.panels.panels["R"]["prices"], old["prices"])
+        self.assertEqual(self.limiter.calls[-1][1], pd.Timestamp("2024-01-01"))
+
+    def test_refresh_batches_tickers_per_request(self):
+        limiter = YFinanceRateLimiter(calls_per_minute=60000, burst=100)
+        requests = []
+
+        def fake_batch(tickers, start, end):
+            requests.append(list(tickers))
+            index = pd.bdate_range(start, end, inclusive="left")
+            columns = pd.MultiIndex.from_product([tickers, ["Close"]], names=["Ticker", "Price"])
+            return pd.DataFrame(1.0, index=index, columns=columns)
+
+        limiter._download_batch = fake_batch
+        region = "India (NIFTY 50)"
+        panels = RegionalPanels(limiter, regions={region: REGION_TICKERS[region]})
+        entry = panels.refresh(region, "2024-01-01")
+        # One multi-ticker request per five tickers, not one per ticker
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(entry["prices"].shape[1], len(REGION_TICKERS[region]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+import pandas as pd
+from risk_cache import RiskModelCache, panel_fingerprint
+
+
+def make_prices(seed, n=60):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=n)
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n, 3)), axis=0)),
+                        index=dates, columns=["A", "B", "C"])
+
+
+class TestRiskModelCache(unittest.TestCase):
+    def test_fingerprint_tracks_content(self):
+        prices = make_prices(0)
+        self.assertEqual(panel_fingerprint(prices), panel_fingerprint(prices.copy()))
+        changed = prices.copy()
+        changed.iloc[-1, 0] += 1
+        self.assertNotEqual(panel_fingerprint(prices), panel_fingerprint(changed))
+        self.assertNotEqual(panel_fingerprint(prices), panel_fingerprint(prices.rename(columns={"A": "Z"})))
+
+    def test_reuses_and_matches_direct(self):
+        cache = RiskModelCache()
+        prices = make_prices(1)
+        cov = cache.sample_cov(prices)
+        self.assertIs(cache.sample_cov(prices.copy()), cov)
+        pd.testing.assert_frame_equal(cov, prices.pct_change().dropna().cov())
+        pd.testing.assert_frame_equal(cache.corr(prices), prices.pct_change().corr())
+        # Second sample_cov call, plus corr reusing the cached returns
+        self.assertEqual(cache.hits, 2)
+
+    def test_lru_eviction(self):
+        cache = RiskModelCache(maxsize=2)
+        panels = [make_prices(i) for i in range(3)]
+        for p in panels:
+            cache.corr(p)
+        cache.corr(panels[2])
+        self.assertEqual(len(cache.entries), 2)
+        self.assertNotIn(panel_fingerprint(panels[0]), cache.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
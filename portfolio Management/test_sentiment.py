@@ -0,0 +1,38 @@
+import unittest
+from sentiment import SentimentService
+
+
+class CountingPipeline:
+    """Stands in for the FinBERT pipeline: labels by keyword and records each call"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=None):
+        self.calls.append((list(texts), batch_size))
+        return [{"label": "Positive" if "growth" in t else "Negative", "score": 0.9} for t in texts]
+
+
+class TestSentimentService(unittest.TestCase):
+    def setUp(self):
+        self.service = SentimentService(batch_size=8)
+        self.pipeline = CountingPipeline()
+        self.service._pipeline = self.pipeline
+
+    def test_batches_and_caches(self):
+        items = [("A", "A growth"), ("B", "B fines"), ("A", "A growth"), ("C", "C growth")]
+        scores = self.service.score(items)
+        self.assertEqual([s["label"] for s in scores], ["Positive", "Negative", "Positive", "Positive"])
+        # One pipeline call, duplicate text scored once
+        self.assertEqual(self.pipeline.calls, [(["A growth", "B fines", "C growth"], 8)])
+
+        self.service.score([("B", "B fines"), ("D", "D growth")])
+        self.assertEqual(self.pipeline.calls[-1][0], ["D growth"])
+
+    def test_cache_is_per_ticker(self):
+        self.service.score([("A", "Shares rise on growth")])
+        self.service.score([("B", "Shares rise on growth")])
+        self.assertEqual(len(self.pipeline.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
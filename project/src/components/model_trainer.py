@@ -22,10 +22,26 @@ from src.utils import evaluate_models
 @dataclass
 class model_trainer_config_files:
     trained_model_file_path= os.path.join("artifacts","model.pkl")
+    n_jobs: int = -1  # Worker processes shared by every model's search (-1 = all cores)
+    cv: int = 3
+    # "grid" (exhaustive), "halving" (successive halving on growing row subsamples)
+    # or "random" (random order until each model has used search_time_budget seconds of fit time)
+    search_mode: str = "grid"
+    halving_factor: int = 3
+    search_time_budget: float = 60.0
 
 class model_trainer:
     def __init__(self):
         self.model_trainer_config = model_trainer_config_files()
+        self.search_report = {}  # name -> fits, fit_seconds, train_rows, budget_share of the last search
+
+    def search_options(self):
+        config = self.model_trainer_config
+        if config.search_mode == "halving":
+            return {"factor": config.halving_factor}
+        if config.search_mode == "random":
+            return {"time_budget": config.search_time_budget}
+        return {}
 
     def initiate_model_training(self,train_array,test_array):
         try:
@@ -137,13 +153,17 @@ class model_trainer:
                 }
             }
 
-            model_report: dict= evaluate_models(X_train=X_train,y_train=y_train,X_test = X_test , y_test = y_test ,models=models,params=param)
+            model_report: dict= evaluate_models(X_train=X_train,y_train=y_train,X_test = X_test , y_test = y_test ,models=models,params=param,
+                                                n_jobs=self.model_trainer_config.n_jobs,cv=self.model_trainer_config.cv,
+                                                search=self.model_trainer_config.search_mode,
+                                                search_report=self.search_report,**self.search_options())
 
             best_model_score = max(sorted(model_report.values()))
 
             best_model_name = list(model_report.keys())[
                 list(model_report.values()).index(best_model_score)
             ]
+            # evaluate_models stored the refit best estimator of each model back in `models`
             best_model = models[best_model_name]
             if best_model_score <0.6:
                 raise CustomException("No best model found")
@@ -0,0 +1,39 @@
+"""
+Fit functions executed inside the hyperparameter-search worker pool.
+Kept apart from src.utils so worker processes do not import src.logger (which opens a new log file per process).
+"""
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+
+# Parameters that control an estimator's own threads; inside the shared pool each fit gets one
+INNER_THREAD_PARAMS = ("n_jobs", "thread_count")
+# CatBoost's get_params() lists only parameters passed explicitly, so its thread
+# parameter is set by type even when absent (it otherwise uses every core)
+THREAD_PARAM_BY_TYPE = {"CatBoostRegressor": "thread_count", "CatBoostClassifier": "thread_count"}
+
+def single_threaded(model,params):
+    inner = {k: 1 for k in INNER_THREAD_PARAMS if k in model.get_params()}
+    if type(model).__name__ in THREAD_PARAM_BY_TYPE:
+        inner[THREAD_PARAM_BY_TYPE[type(model).__name__]] = 1
+    return {**params, **inner}
+
+def fit_and_score(model,params,X,y,train_idx,test_idx):
+    """(test r2, fit seconds) for one fold"""
+    start = time.perf_counter()
+    # Same as GridSearchCV with error_score=nan: a failing candidate scores nan instead of aborting the search
+    try:
+        model = clone(model).set_params(**params)
+        model.fit(X[train_idx],y[train_idx])
+        return r2_score(y[test_idx],model.predict(X[test_idx])), time.perf_counter() - start
+    except Exception:
+        return np.nan, time.perf_counter() - start
+
+def refit(model,params,X,y):
+    # Thread settings to restore for prediction: the estimator's own, overridden by searched ones (e.g. n_jobs=-1)
+    original = model.get_params()
+    restore = {k: original[k] for k in single_threaded(model,{}) if k in original}
+    model = clone(model).set_params(**single_threaded(model,params))
+    model.fit(X,y)
+    return model.set_params(**{**restore, **params})
@@ -4,9 +4,12 @@ import numpy as np
 import pandas as pd
 import dill
 
+from joblib import Parallel, delayed, effective_n_jobs
 from src.exception import CustomException
+from src.logger import logging
+from src.search_workers import fit_and_score, refit, single_threaded
 from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import ParameterGrid, check_cv
 
 def save_object(file_path,obj):
     try:
@@ -18,26 +21,136 @@ def save_object(file_path,obj):
     except Exception as e:
         raise CustomException(e,sys)
     
-def evaluate_models(X_train,y_train,X_test,y_test,models,params):
+SEARCH_MODES = ("grid", "halving", "random")
+
+def _score_candidates(pool,models,candidates,todo,X,y,cv,usage):
+    """
+    Mean cv r2 for candidate indices todo[name] of each model, all fits in one pool call.
+    X, y may be a subsample (halving rounds). Fit counts, fit seconds and training rows go into usage.
+    """
+    splits = list(check_cv(cv,y,classifier=False).split(X,y))
+    tasks = [(name,i,fold) for name in todo for i in todo[name] for fold in range(len(splits))]
+    results = pool(
+        delayed(fit_and_score)(models[name],single_threaded(models[name],candidates[name][i]),X,y,*splits[fold])
+        for name,i,fold in tasks
+    )
+    scores = {name: {i: [] for i in todo[name]} for name in todo}
+    for (name,i,fold),(score,seconds) in zip(tasks,results):
+        scores[name][i].append(score)
+        usage[name]["fits"] += 1
+        usage[name]["fit_seconds"] += seconds
+        usage[name]["train_rows"] += len(splits[fold][0])
+    # Any failed fold makes the mean nan, as in GridSearchCV
+    return {name: {i: float(np.mean(s)) for i,s in scores[name].items()} for name in scores}
+
+def _best(means):
+    """Candidate index with the highest mean score; ties to the first, nan last (None if all failed)"""
+    finite = {i: m for i,m in means.items() if not np.isnan(m)}
+    return max(finite, key=lambda i: (finite[i], -i)) if finite else None
+
+def _grid_search(pool,models,candidates,X,y,cv,usage,**kwargs):
+    todo = {name: list(range(len(candidates[name]))) for name in models}
+    means = _score_candidates(pool,models,candidates,todo,X,y,cv,usage)
+    return {name: _best(means[name]) for name in models}
+
+def _halving_rounds(n_candidates,factor):
+    rounds = 0
+    while n_candidates > 1:
+        n_candidates = int(np.ceil(n_candidates / factor))
+        rounds += 1
+    return rounds
+
+def _halving_search(pool,models,candidates,X,y,cv,usage,factor=3,min_resources=None,random_state=42,**kwargs):
+    """
+    Successive halving with training rows as the resource: every round scores the surviving
+    candidates of all models on a larger nested subsample and keeps the best 1/factor of each.
+    Each model joins so that its last round, which picks the winner, uses the whole training set.
+    """
+    if factor < 2:
+        raise ValueError(f"halving factor must be at least 2, got {factor!r}")
+    order = np.random.default_rng(random_state).permutation(len(y))
+    min_resources = min_resources or 10 * cv
+    rounds = {name: _halving_rounds(len(candidates[name]),factor) for name in models}
+    n_rounds = max(rounds.values())
+    survivors = {name: list(range(len(candidates[name]))) for name in models}
+    for r in range(n_rounds):
+        todo = {name: survivors[name] for name in models if r >= n_rounds - rounds[name] and len(survivors[name]) > 1}
+        if not todo:
+            continue
+        n_rows = min(len(y), max(min_resources, len(y) // factor ** (n_rounds - 1 - r)))
+        rows = np.sort(order[:n_rows])
+        means = _score_candidates(pool,models,candidates,todo,X[rows],y[rows],cv,usage)
+        for name,ids in todo.items():
+            ranked = sorted((i for i in ids if not np.isnan(means[name][i])), key=lambda i: (-means[name][i], i))
+            survivors[name] = ranked[:int(np.ceil(len(ids) / factor))]
+        logging.info(f"Halving round {r + 1}/{n_rounds}: {n_rows} rows, {sum(len(ids) for ids in todo.values())} candidates")
+    return {name: ids[0] if ids else None for name,ids in survivors.items()}
+
+def _random_search(pool,models,candidates,X,y,cv,usage,time_budget=60.0,random_state=42,**kwargs):
+    """
+    Random search over each grid until a model has used `time_budget` seconds of fit time
+    (summed over workers) or run out of candidates. Every round tries one more batch per model.
+    """
+    rng = np.random.default_rng(random_state)
+    queues = {name: list(rng.permutation(len(candidates[name]))) for name in models}
+    batch = max(1, effective_n_jobs(pool.n_jobs))
+    means = {name: {} for name in models}
+    while True:
+        todo = {name: [int(i) for i in q[:batch]] for name,q in queues.items()
+                if q and usage[name]["fit_seconds"] < time_budget}
+        if not todo:
+            break
+        for name,ids in todo.items():
+            queues[name] = queues[name][len(ids):]
+        for name,round_means in _score_candidates(pool,models,candidates,todo,X,y,cv,usage).items():
+            means[name].update(round_means)
+    return {name: _best(means[name]) for name in models}
+
+def evaluate_models(X_train,y_train,X_test,y_test,models,params,n_jobs=-1,cv=3,search="grid",search_report=None,**search_options):
+    """
+    Hyperparameter search for every model with all (model, params, fold) fits spread over one
+    pool of n_jobs workers; estimators train single-threaded inside it.
+    search: "grid" (exhaustive), "halving" (successive halving on row subsamples; options
+    factor, min_resources) or "random" (options time_budget seconds of fit time per model).
+    The winning params of each model are refit once on the full training set and stored back
+    in models[name]. How much of the exhaustive grid's budget each model used (fits, fit_seconds,
+    train_rows, budget_share) is logged and, if a search_report dict is passed, stored in it.
+    Returns {name: test r2}.
+    """
     try : 
-        report = {}
+        if search not in SEARCH_MODES:
+            raise ValueError(f"search must be one of {SEARCH_MODES}, got {search!r}")
+        X_train,y_train = np.asarray(X_train),np.asarray(y_train)
+        candidates = {name: list(ParameterGrid(params[name])) for name in models}
+        usage = {name: {"fits": 0, "fit_seconds": 0.0, "train_rows": 0} for name in models}
+        searches = {"grid": _grid_search, "halving": _halving_search, "random": _random_search}
+
+        logging.info(f"{search} search over {len(models)} models, n_jobs={n_jobs}")
+        with Parallel(n_jobs=n_jobs) as pool:
+            best = searches[search](pool,models,candidates,X_train,y_train,cv,usage,**search_options)
+            best_params = {}
+            for name,i in best.items():
+                if i is None:
+                    logging.info(f"Every candidate failed for {name}; skipping it")
+                    continue
+                best_params[name] = candidates[name][i]
+                logging.info(f"{name}: best params {best_params[name]}")
 
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para = params[list(models.keys())[i]]
-            gs = GridSearchCV(model,para,cv=3)
-            
-            gs.fit(X_train,y_train)
-            #model.fit(X_train,y_train)
-
-            model.set_params(**gs.best_params_)
-            model.fit(X_train,y_train)
-            y_train_pred = model.predict(X_train)
-            y_test_pred =  model.predict(X_test)
-            train_model_score = r2_score(y_train,y_train_pred)
-            test_model_score = r2_score(y_test,y_test_pred)
-            report[list(models.keys())[i]] = test_model_score
-        
+            fitted = pool(delayed(refit)(models[name],best_params[name],X_train,y_train) for name in best_params)
+
+        # Budget used relative to the exhaustive grid: training rows fitted, over cv fits of every candidate
+        full_rows = sum(len(train) for train,_ in check_cv(cv,y_train,classifier=False).split(X_train,y_train))
+        for name,u in usage.items():
+            share = u["train_rows"] / (len(candidates[name]) * full_rows)
+            if search_report is not None:
+                search_report[name] = {**u, "budget_share": share, "best_params": best_params.get(name)}
+            logging.info(f"Search budget {name}: {u['fits']} fits, {u['fit_seconds']:.1f}s fit time, "
+                         f"{share:.1%} of the exhaustive grid's training rows")
+
+        report = {}
+        for name,model in zip(best_params,fitted):
+            models[name] = model
+            report[name] = r2_score(y_test,model.predict(X_test))
         return report
     except Exception as e:
         raise CustomException(e,sys)
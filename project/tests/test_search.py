@@ -0,0 +1,140 @@
+import unittest
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.datasets import make_regression
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import GridSearchCV
+from src.search_workers import single_threaded
+from src.utils import _halving_rounds, evaluate_models
+
+
+class CatBoostRegressor(BaseEstimator, RegressorMixin):
+    """Stand-in with CatBoost's behaviour: thread_count is missing from get_params() unless passed"""
+    def __init__(self, depth=4):
+        self.depth = depth
+
+    def set_params(self, **params):
+        for key, value in params.items():
+            setattr(self, key, value)
+        return self
+
+    def fit(self, X, y):
+        # CatBoost defaults to every core; inside the shared pool it must be limited to one
+        if getattr(self, "thread_count", -1) != 1:
+            raise RuntimeError("CatBoost fit was not limited to one thread")
+        self.model_ = LinearRegression().fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.model_.predict(X)
+
+
+class SingleThreadedForest(RandomForestRegressor):
+    def fit(self, X, y, sample_weight=None):
+        if self.n_jobs != 1:
+            raise RuntimeError("Forest fit was not limited to one thread")
+        return super().fit(X, y, sample_weight)
+
+
+def make_data(n=300, seed=0):
+    X, y = make_regression(n, 6, noise=5, random_state=seed)
+    return X[:240], y[:240], X[240:], y[240:]
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_single_threaded_params(self):
+        self.assertEqual(single_threaded(CatBoostRegressor(), {"depth": 6}), {"depth": 6, "thread_count": 1})
+        self.assertEqual(single_threaded(RandomForestRegressor(), {"n_jobs": -1}), {"n_jobs": 1})
+        self.assertEqual(single_threaded(Ridge(), {"alpha": 2.0}), {"alpha": 2.0})
+
+    def test_inner_threading_limited_in_pool(self):
+        X_train, y_train, X_test, y_test = make_data()
+        models = {"CatBoost": CatBoostRegressor(), "Forest": SingleThreadedForest()}
+        params = {"CatBoost": {"depth": [4, 6]},
+                  "Forest": {"n_estimators": [10, 20], "n_jobs": [-1], "random_state": [42]}}
+        report = evaluate_models(X_train, y_train, X_test, y_test, models, params, n_jobs=2)
+        # Every fit raised unless its threads were limited, so a failed search would be skipped
+        self.assertEqual(set(report), {"CatBoost", "Forest"})
+        # The searched setting comes back for prediction
+        self.assertEqual(models["Forest"].n_jobs, -1)
+
+    def test_grid_matches_gridsearchcv(self):
+        X_train, y_train, X_test, y_test = make_data()
+        grid = {"n_estimators": [10, 30], "max_depth": [None, 3], "random_state": [42]}
+        models = {"Forest": RandomForestRegressor()}
+        report = evaluate_models(X_train, y_train, X_test, y_test, models, {"Forest": grid}, n_jobs=2)
+        gs = GridSearchCV(RandomForestRegressor(), grid, cv=3).fit(X_train, y_train)
+        self.assertEqual(models["Forest"].get_params(), gs.best_estimator_.get_params())
+        self.assertAlmostEqual(report["Forest"], gs.best_estimator_.score(X_test, y_test))
+
+
+class TestSearchModes(unittest.TestCase):
+    ALPHAS = {"alpha": [0.01, 0.1, 1.0, 3.0, 10.0, 30.0, 100.0, 300.0, 1000.0]}
+
+    def search(self, search, params, **options):
+        X_train, y_train, X_test, y_test = make_data()
+        models = {name: Ridge() for name in params}
+        usage = {}
+        report = evaluate_models(X_train, y_train, X_test, y_test, models, params, n_jobs=1,
+                                 search=search, search_report=usage, **options)
+        return report, usage, models
+
+    def test_halving_rounds(self):
+        self.assertEqual(_halving_rounds(1, 3), 0)
+        self.assertEqual(_halving_rounds(2, 3), 1)
+        self.assertEqual(_halving_rounds(9, 3), 2)
+        self.assertEqual(_halving_rounds(18, 3), 3)
+        self.assertEqual(_halving_rounds(4, 10), 1)
+
+    def test_grid_uses_full_budget(self):
+        _, usage, _ = self.search("grid", {"Ridge": self.ALPHAS})
+        self.assertEqual(usage["Ridge"]["fits"], 27)
+        self.assertAlmostEqual(usage["Ridge"]["budget_share"], 1.0)
+        self.assertEqual(usage["Ridge"]["best_params"], {"alpha": 0.01})
+
+    def test_halving_prunes_survivors(self):
+        report, usage, models = self.search("halving", {"Ridge": self.ALPHAS}, factor=3)
+        # Round 1: 9 candidates on 80 rows; round 2: the best 3 on all 240 rows
+        self.assertEqual(usage["Ridge"]["fits"], 9 * 3 + 3 * 3)
+        self.assertEqual(usage["Ridge"]["train_rows"], 9 * 160 + 3 * 480)
+        self.assertLess(usage["Ridge"]["budget_share"], 1.0)
+        self.assertEqual(usage["Ridge"]["best_params"], {"alpha": 0.01})
+        self.assertEqual(models["Ridge"].alpha, 0.01)
+        self.assertIn("Ridge", report)
+
+    def test_halving_late_joiner_uses_full_rows(self):
+        params = {"Ridge": self.ALPHAS, "Small": {"alpha": [0.01, 1.0, 100.0]}}
+        _, usage, _ = self.search("halving", params, factor=3)
+        # One round for the small grid, run only in the last (full data) round
+        self.assertEqual(usage["Small"]["fits"], 9)
+        self.assertAlmostEqual(usage["Small"]["budget_share"], 1.0)
+        self.assertEqual(usage["Small"]["best_params"], {"alpha": 0.01})
+
+    def test_halving_factor_larger_than_grid(self):
+        # ceil(4 / 10) keeps one survivor: a single round over the whole grid
+        _, usage, _ = self.search("halving", {"Ridge": {"alpha": [0.01, 1.0, 10.0, 100.0]}}, factor=10)
+        self.assertEqual(usage["Ridge"]["fits"], 12)
+        self.assertAlmostEqual(usage["Ridge"]["budget_share"], 1.0)
+        self.assertEqual(usage["Ridge"]["best_params"], {"alpha": 0.01})
+
+    def test_halving_factor_below_two_rejected(self):
+        with self.assertRaises(Exception) as ctx:
+            self.search("halving", {"Ridge": self.ALPHAS}, factor=1)
+        self.assertIn("halving factor", str(ctx.exception))
+
+    def test_random_stops_when_budget_used(self):
+        # The first batch (one candidate with n_jobs=1) spends the budget; no more are tried
+        _, usage, _ = self.search("random", {"Ridge": self.ALPHAS}, time_budget=1e-9)
+        self.assertEqual(usage["Ridge"]["fits"], 3)
+        self.assertAlmostEqual(usage["Ridge"]["budget_share"], 1 / 9)
+        self.assertIsNotNone(usage["Ridge"]["best_params"])
+
+    def test_random_with_ample_budget_covers_grid(self):
+        _, usage, _ = self.search("random", {"Ridge": self.ALPHAS}, time_budget=1e6)
+        self.assertEqual(usage["Ridge"]["fits"], 27)
+        self.assertAlmostEqual(usage["Ridge"]["budget_share"], 1.0)
+        self.assertEqual(usage["Ridge"]["best_params"], {"alpha": 0.01})
+
+
+if __name__ == '__main__':
+    unittest.main()